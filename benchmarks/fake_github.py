@@ -0,0 +1,418 @@
+"""Local stand-in for the GitHub REST endpoints the dashboard uses.
+
+Serves a synthetic user with ``--repos`` repositories and ``--commits``
+commits spread evenly across them, plus pull requests, reviews, issues and
+workflow runs per repository. Every record is derived from its position, so
+the data is deterministic and listings are generated page by page: a
+million commits cost no more memory than a hundred.
+
+The server follows the parts of the API the scripts rely on: ``per_page`` /
+``page`` with ``Link: rel="next"``, ``ETag`` / ``If-None-Match`` (304),
+``X-RateLimit-*`` headers, ``commits?since=``, ``issues?since=``,
+``pulls?state=``, ``actions/runs?created=>=`` and ``compare/base...head``.
+
+Run it on its own and point the scripts at it with ``GITHUB_API_URL``:
+
+    python benchmarks/fake_github.py --repos 50 --commits 5000 --port 8800
+    GITHUB_API_URL=http://127.0.0.1:8800 GITHUB_REPOSITORY=bench/dashboard \\
+        GH_TOKEN=x python scripts/run_all.py
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+USERNAME = "bench"
+MESSAGES = [
+    "Fix flaky test in parser",
+    "Add great new feature",
+    "Refactor storage layer",
+    "Update docs",
+    "Terrible hack, revert later",
+    "Bump dependencies",
+    "Improve error messages",
+]
+LANGUAGES = ["Python", "Go", "TypeScript", "Rust", "Shell", "HTML"]
+PEOPLE = ["alice", "bob", "carol", "dave"]
+
+
+def _timestamp(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _digest(*parts):
+    return int(hashlib.md5("/".join(map(str, parts)).encode()).hexdigest()[:8], 16)
+
+
+def _sha(*parts):
+    return hashlib.sha1("/".join(map(str, parts)).encode()).hexdigest()
+
+
+class Listing:
+    """Sequence of ``count`` records built on demand by ``make(index)``."""
+
+    def __init__(self, count, make):
+        self.count = count
+        self.make = make
+
+    def __len__(self):
+        return self.count
+
+    def page(self, start, stop):
+        return [self.make(index) for index in range(start, min(stop, self.count))]
+
+
+class SyntheticUser:
+    """Deterministic repositories and history for one user.
+
+    Commits, pull requests, issues and runs are numbered newest first, one
+    step apart in time, so a ``since`` filter is a prefix of the listing.
+    """
+
+    def __init__(self, repos=5, commits=100, pulls=30, issues=20, runs=30, now=None):
+        self.repos = repos
+        self.commits_per_repo = max(1, commits // max(repos, 1))
+        self.pulls = pulls
+        self.issues = issues
+        self.runs = runs
+        self.now = now or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        # Spread each repository's history over roughly two years
+        self.commit_step = max(timedelta(minutes=1), timedelta(days=730) / self.commits_per_repo)
+
+    # -- user level -----------------------------------------------------
+
+    def repo_name(self, index):
+        return f"repo-{index:05d}"
+
+    def repo(self, base, index):
+        name = self.repo_name(index)
+        return {
+            "name": name,
+            "full_name": f"{USERNAME}/{name}",
+            "fork": index % 7 == 3,
+            "default_branch": "main",
+            "size": 50 + _digest(name, "size") % 50000,
+            "stargazers_count": _digest(name, "stars") % 200,
+            "forks_count": _digest(name, "forks") % 40,
+            "watchers_count": _digest(name, "stars") % 200,
+            "open_issues_count": self.issues // 2,
+            "allow_auto_merge": index % 2 == 0,
+            "languages_url": f"{base}/repos/{USERNAME}/{name}/languages",
+            "created_at": _timestamp(self.now - timedelta(days=30 + index * 11)),
+            "updated_at": _timestamp(self.now - timedelta(hours=index * 5)),
+            "pushed_at": _timestamp(self.now - timedelta(hours=index * 7)),
+        }
+
+    def profile(self):
+        return {"login": USERNAME, "followers": 42, "following": 7}
+
+    # -- repository level -----------------------------------------------
+
+    def commit_date(self, index):
+        return self.now - self.commit_step * index
+
+    def commit(self, name, index, branch="main"):
+        sha = _sha(name, branch, index)
+        count = self.commits_per_repo if branch == "main" else min(7, self.commits_per_repo)
+        return {
+            "sha": sha,
+            "parents": [{"sha": _sha(name, branch, index + 1)}] if index + 1 < count else [],
+            "commit": {
+                "message": MESSAGES[_digest(sha) % len(MESSAGES)],
+                "author": {"name": PEOPLE[_digest(sha, "a") % len(PEOPLE)], "date": _timestamp(self.commit_date(index))},
+            },
+        }
+
+    def commits(self, name, since=None, branch="main"):
+        count = self.commits_per_repo if branch == "main" else min(7, self.commits_per_repo)
+        if since:
+            age = self.now - datetime.fromisoformat(since.replace("Z", "+00:00"))
+            count = min(count, max(0, age // self.commit_step + 1))
+        return Listing(count, lambda index: self.commit(name, index, branch))
+
+    def commit_detail(self, sha):
+        additions, deletions = _digest(sha, "+") % 400, _digest(sha, "-") % 200
+        files = [{"filename": f"src/module_{_digest(sha, i) % 40}.py"} for i in range(1 + _digest(sha) % 4)]
+        return {"sha": sha, "stats": {"additions": additions, "deletions": deletions}, "files": files}
+
+    def branches(self, name):
+        return [
+            {"name": "main", "commit": {"sha": self.commit(name, 0)["sha"]}},
+            {"name": "dev", "commit": {"sha": self.commit(name, 0, "dev")["sha"]}},
+        ]
+
+    def compare(self, name, base, head):
+        """The "dev" branch shares no commits with "main"."""
+        count = lambda branch: len(self.commits(name, branch=branch))  # noqa: E731
+        if base == head:
+            return {"status": "identical", "ahead_by": 0, "behind_by": 0, "commits": []}
+        return {"status": "diverged", "ahead_by": count(head), "behind_by": count(base), "commits": []}
+
+    def languages(self, name):
+        first = _digest(name, "lang") % len(LANGUAGES)
+        return {LANGUAGES[(first + i) % len(LANGUAGES)]: 10000 // (i + 1) for i in range(1 + _digest(name) % 3)}
+
+    def topics(self, name):
+        return {"names": ["python", "hackathon"] if _digest(name, "topic") % 5 == 0 else ["python"]}
+
+    def contributors(self, name):
+        return [{"login": login, "contributions": 10 + i} for i, login in enumerate(PEOPLE[: 1 + _digest(name) % 4])]
+
+    def pull(self, base, name, index):
+        number = self.pulls - index
+        created = self.now - timedelta(hours=6 * index + 3)
+        merged = _timestamp(created + timedelta(hours=1 + number % 9)) if number % 3 else None
+        closed = merged or (_timestamp(created + timedelta(hours=2)) if number % 4 == 0 else None)
+        return {
+            "number": number,
+            "url": f"{base}/repos/{USERNAME}/{name}/pulls/{number}",
+            "state": "closed" if closed else "open",
+            "user": {"login": PEOPLE[number % len(PEOPLE)]},
+            "created_at": _timestamp(created),
+            "updated_at": _timestamp(created + timedelta(hours=2)),
+            "closed_at": closed,
+            "merged_at": merged,
+            "merge_commit_sha": self.commit(name, index % self.commits_per_repo)["sha"] if merged else None,
+            "labels": [{"name": ["bug", "feature", "docs"][number % 3]}],
+            "comments": number % 5,
+            "review_comments": number % 3,
+        }
+
+    def pulls_listing(self, base, name, state="open"):
+        pulls = [self.pull(base, name, index) for index in range(self.pulls)]
+        return [pr for pr in pulls if state == "all" or pr["state"] == state]
+
+    def reviews(self, name, number):
+        created = self.now - timedelta(hours=6 * (self.pulls - number) + 3)
+        return [
+            {
+                "id": _digest(name, number, i),
+                "user": {"login": PEOPLE[(number + i) % len(PEOPLE)]},
+                "state": "APPROVED" if i == 0 else "COMMENTED",
+                "submitted_at": _timestamp(created + timedelta(minutes=30 * (i + 1))),
+            }
+            for i in range(number % 3)
+        ]
+
+    def issues_listing(self, base, name, since=None):
+        issues = []
+        for index in range(self.issues):
+            created = self.now - timedelta(hours=10 * index + 1)
+            closed = _timestamp(created + timedelta(days=1)) if index % 2 else None
+            issues.append({
+                "number": 10000 + index,
+                "user": {"login": PEOPLE[index % len(PEOPLE)]},
+                "state": "closed" if closed else "open",
+                "created_at": _timestamp(created),
+                "updated_at": closed or _timestamp(created),
+                "closed_at": closed,
+                "labels": [{"name": "bug"}],
+                "body": "cc @bob" if index % 3 else "",
+            })
+        for pr in self.pulls_listing(base, name, "all"):
+            issues.append({
+                "number": pr["number"], "pull_request": {"url": pr["url"]}, "user": pr["user"],
+                "state": pr["state"], "created_at": pr["created_at"], "updated_at": pr["updated_at"],
+                "closed_at": pr["closed_at"], "labels": pr["labels"], "body": "",
+            })
+        if since:
+            issues = [issue for issue in issues if issue["updated_at"] >= since]
+        return issues
+
+    def runs_listing(self, name, created=None):
+        runs = []
+        for index in range(self.runs):
+            started = self.now - timedelta(hours=8 * index + 2)
+            runs.append({
+                "id": _digest(name, "run", index),
+                "event": "push" if index % 3 else "pull_request",
+                "status": "completed",
+                "conclusion": "failure" if index % 5 == 0 else "success",
+                "created_at": _timestamp(started),
+                "run_started_at": _timestamp(started),
+                "updated_at": _timestamp(started + timedelta(minutes=2 + index % 11)),
+            })
+        if created and created.startswith(">="):
+            runs = [run for run in runs if run["created_at"] >= created[2:]]
+        return runs
+
+
+class RateLimit:
+    """Hourly request allowance reported in ``X-RateLimit-*`` headers."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.remaining = limit
+        self.reset = int(time.time()) + 3600
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if time.time() >= self.reset:
+                self.remaining, self.reset = self.limit, int(time.time()) + 3600
+            allowed = self.remaining > 0
+            self.remaining = max(self.remaining - 1, 0)
+            return allowed, {
+                "X-RateLimit-Limit": str(self.limit),
+                "X-RateLimit-Remaining": str(self.remaining),
+                "X-RateLimit-Reset": str(self.reset),
+            }
+
+
+class Stats:
+    """Requests served, split by outcome, and response bytes sent."""
+
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def add(self, status, size):
+        with self._lock:
+            self.requests += 1
+            self.not_modified += status == 304
+            self.bytes += size
+
+    def snapshot(self):
+        with self._lock:
+            return {"requests": self.requests, "not_modified": self.not_modified, "bytes": self.bytes}
+
+
+def route(user, base, path, query):
+    """Body for a GET of ``path``, or None for an unknown resource."""
+    arg = lambda key, default=None: query.get(key, [default])[0]  # noqa: E731
+    if path == f"/users/{USERNAME}":
+        return user.profile()
+    if path == f"/users/{USERNAME}/repos":
+        return Listing(user.repos, lambda index: user.repo(base, index))
+    if path == f"/users/{USERNAME}/orgs":
+        return [{"login": "bench-org"}, {"login": "open-source-club"}]
+    if path == f"/users/{USERNAME}/starred":
+        return Listing(250, lambda index: {"id": index, "full_name": f"someone/starred-{index}"})
+
+    match = re.fullmatch(rf"/repos/{USERNAME}/([^/]+)(/.*)?", path)
+    if not match:
+        return None
+    name, sub = match.group(1), match.group(2) or ""
+    if sub == "/commits":
+        return user.commits(name, arg("since"), "main" if arg("sha", "main") == "main" else "dev")
+    if detail := re.fullmatch(r"/commits/([0-9a-f]{40})", sub):
+        return user.commit_detail(detail.group(1))
+    if sub == "/branches":
+        return user.branches(name)
+    if compare := re.fullmatch(r"/compare/(main|dev)\.\.\.(main|dev)", sub):
+        return user.compare(name, compare.group(1), compare.group(2))
+    if sub == "/languages":
+        return user.languages(name)
+    if sub == "/topics":
+        return user.topics(name)
+    if sub == "/contributors":
+        return user.contributors(name)
+    if sub == "/pulls":
+        return user.pulls_listing(base, name, arg("state", "open"))
+    if reviews := re.fullmatch(r"/pulls/(\d+)/reviews", sub):
+        return user.reviews(name, int(reviews.group(1)))
+    if sub == "/issues":
+        return user.issues_listing(base, name, arg("since"))
+    if sub == "/actions/runs":
+        runs = user.runs_listing(name, arg("created"))
+        return {"total_count": len(runs), "workflow_runs": runs}
+    return None
+
+
+def _paginate(body, base, path, query):
+    """Cut one page out of a list body; returns ``(body, next page URL or None)``."""
+    wrapped = isinstance(body, dict) and "workflow_runs" in body
+    records = body["workflow_runs"] if wrapped else body
+    if not isinstance(records, (list, Listing)):
+        return body, None
+    per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+    page = int(query.get("page", ["1"])[0])
+    start, stop = (page - 1) * per_page, page * per_page
+    items = records.page(start, stop) if isinstance(records, Listing) else records[start:stop]
+    next_url = None
+    if stop < len(records):
+        params = {key: values[0] for key, values in query.items()}
+        next_url = f"{base}{path}?{urlencode({**params, 'page': page + 1})}"
+    return ({**body, "workflow_runs": items} if wrapped else items), next_url
+
+
+def make_server(user, port=0, host="127.0.0.1", rate_limit=1_000_000):
+    """A threaded HTTP server for ``user``; ``server.stats`` counts the traffic."""
+    limiter = RateLimit(rate_limit)
+    stats = Stats()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            base = f"http://{self.headers.get('Host', f'{host}:{port}')}"
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            allowed, headers = limiter.take()
+            if not allowed:
+                return self._send(403, {"message": "API rate limit exceeded"}, headers)
+            body = route(user, base, url.path, query)
+            if body is None:
+                return self._send(404, {"message": "Not Found"}, headers)
+            body, next_url = _paginate(body, base, url.path, query)
+            if next_url:
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            self._send(200, body, headers)
+
+        def _send(self, status, body, headers):
+            data = json.dumps(body).encode()
+            etag = f'"{hashlib.md5(data).hexdigest()}"'
+            if status == 200 and self.headers.get("If-None-Match") == etag:
+                status, data = 304, b""
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            if status in (200, 304):
+                self.send_header("ETag", etag)
+            if data:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            stats.add(status, len(data))
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.stats = stats
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--commits", type=int, default=100, help="total commits across all repositories")
+    parser.add_argument("--pulls", type=int, default=30, help="pull requests per repository")
+    parser.add_argument("--issues", type=int, default=20, help="issues per repository")
+    parser.add_argument("--runs", type=int, default=30, help="workflow runs per repository")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000, help="requests per hourly window")
+    parser.add_argument("--port", type=int, default=8800)
+    args = parser.parse_args()
+
+    user = SyntheticUser(args.repos, args.commits, args.pulls, args.issues, args.runs)
+    server = make_server(user, args.port, rate_limit=args.rate_limit)
+    print(f"Serving {args.repos} repos / {args.commits} commits for '{USERNAME}' on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark the dashboard scripts against the local fake GitHub API.
+
+Starts ``fake_github`` with synthetic data of the requested size, then runs
+each script in a fresh working directory (empty store and response cache)
+with ``GITHUB_API_URL`` pointing at it, and reports per script:
+
+* wall time,
+* requests served (and how many were 304 revalidations),
+* response bytes transferred,
+* peak resident memory of the script's process.
+
+Each generator syncs only the sources its own charts read, as it does
+when run on its own; ``run_all.py`` syncs everything once and renders
+every chart, which is what the nightly job runs.
+
+``--warm`` runs every script a second time in the same directory, which is
+what the nightly job sees once its cache and store are populated.
+
+    python benchmarks/run.py --repos 5 --commits 100
+    python benchmarks/run.py --repos 200 --commits 100000 --scripts generate_commits.py --warm
+    python benchmarks/run.py --json bench.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from fake_github import USERNAME, SyntheticUser, make_server
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+DEFAULT_SCRIPTS = sorted(path.name for path in SCRIPTS_DIR.glob("generate_*.py")) + ["run_all.py"]
+
+
+def run_script(script, workdir, api_url, server):
+    """Run one script to completion and measure it."""
+    env = {
+        **os.environ,
+        "GITHUB_API_URL": api_url,
+        "GITHUB_REPOSITORY": f"{USERNAME}/dashboard",
+        "GH_TOKEN": "benchmark",
+        "MPLBACKEND": "Agg",
+    }
+    before = server.stats.snapshot()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / script)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+    after = server.stats.snapshot()
+
+    if process.returncode:
+        sys.stderr.write(stderr.decode(errors="replace"))
+        raise SystemExit(f"{script} exited with {process.returncode}")
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {
+        "script": script,
+        "wall_s": round(wall, 3),
+        "requests": after["requests"] - before["requests"],
+        "not_modified": after["not_modified"] - before["not_modified"],
+        "bytes": after["bytes"] - before["bytes"],
+        "peak_rss_mb": round(rss / 2**20, 1),
+    }
+
+
+def print_table(results):
+    header = f"{'script':<26} {'run':<5} {'wall s':>8} {'requests':>9} {'304s':>6} {'KB':>9} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['script']:<26} {row['run']:<5} {row['wall_s']:>8.2f} {row['requests']:>9} "
+            f"{row['not_modified']:>6} {row['bytes'] / 1024:>9.0f} {row['peak_rss_mb']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repos", type=int, default=5)
+    parser.add_argument("--commits", type=int, default=100, help="total commits across all repositories")
+    parser.add_argument("--pulls", type=int, default=30, help="pull requests per repository")
+    parser.add_argument("--issues", type=int, default=20, help="issues per repository")
+    parser.add_argument("--runs", type=int, default=30, help="workflow runs per repository")
+    parser.add_argument("--scripts", default=",".join(DEFAULT_SCRIPTS), help="comma-separated scripts in scripts/")
+    parser.add_argument("--warm", action="store_true", help="also time a second run with the store and cache filled")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args()
+
+    user = SyntheticUser(args.repos, args.commits, args.pulls, args.issues, args.runs)
+    server = make_server(user)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    results = []
+    for script in args.scripts.split(","):
+        with tempfile.TemporaryDirectory(prefix="dashboard-bench-") as workdir:
+            for run in ("cold", "warm") if args.warm else ("cold",):
+                results.append({**run_script(script, workdir, api_url, server), "run": run})
+    server.shutdown()
+
+    print(f"{args.repos} repos, {args.commits} commits ({user.commits_per_repo} per repo)\n")
+    print_table(results)
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key != "json"}
+        args.json.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
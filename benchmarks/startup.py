@@ -0,0 +1,97 @@
+"""Measure how long each dashboard script takes to import.
+
+Every script is imported ``--repeat`` times in a fresh interpreter with
+``python -X importtime``; the table shows the fastest and median import time
+of the script's module, the interpreter's total wall time, and which heavy
+dependencies the import pulled in (ideally none: they load on first use).
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 10 --max-ms 300 --json startup.json
+
+``--max-ms`` exits non-zero when any script's median import is slower.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+DEFAULT_SCRIPTS = sorted(path.name for path in SCRIPTS_DIR.glob("generate_*.py")) + ["run_all.py"]
+HEAVY = ("matplotlib", "numpy", "pandas", "seaborn", "textblob", "wordcloud")
+
+
+def import_once(module):
+    """Import ``module`` in a new interpreter; returns (import s, wall s, heavy modules)."""
+    code = f"import sys; import {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SCRIPTS_DIR), os.environ.get("PYTHONPATH")]))}
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if process.returncode:
+        sys.stderr.write(process.stderr)
+        raise SystemExit(f"importing {module} failed")
+    # "import time: self [us] | cumulative | imported package"
+    cumulative = None
+    for line in process.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    if cumulative is None:
+        raise SystemExit(f"importing {module} reported no -X importtime line for it")
+    return cumulative / 1e6, wall, process.stdout.split()
+
+
+def measure(script, repeat):
+    module = Path(script).stem
+    runs = [import_once(module) for _ in range(repeat)]
+    imports = [run[0] for run in runs]
+    return {
+        "script": script,
+        "import_min_ms": round(min(imports) * 1000, 1),
+        "import_median_ms": round(statistics.median(imports) * 1000, 1),
+        "wall_median_ms": round(statistics.median(run[1] for run in runs) * 1000, 1),
+        "heavy": runs[-1][2],
+    }
+
+
+def print_table(results):
+    header = f"{'script':<26} {'min ms':>8} {'median ms':>10} {'wall ms':>8}  heavy modules loaded"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['script']:<26} {row['import_min_ms']:>8.1f} {row['import_median_ms']:>10.1f} "
+            f"{row['wall_median_ms']:>8.1f}  {', '.join(row['heavy']) or '-'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scripts", default=",".join(DEFAULT_SCRIPTS), help="comma-separated scripts in scripts/")
+    parser.add_argument("--max-ms", type=float, help="fail when a script's median import exceeds this")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    args = parser.parse_args()
+
+    results = [measure(script, args.repeat) for script in args.scripts.split(",")]
+    print_table(results)
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key != "json"}
+        args.json.write_text(json.dumps({"config": config, "results": results}, indent=2) + "\n")
+    if args.max_ms is not None:
+        slow = [row["script"] for row in results if row["import_median_ms"] > args.max_ms]
+        if slow:
+            raise SystemExit(f"slower than {args.max_ms:g} ms to import: {', '.join(slow)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Running totals folded in from the store one event at a time.
+
+Each metric keeps per-repository counters in ``aggregate_counts`` and the
+ids of the events it has already counted (commit SHAs, touched files) in
+``aggregate_events``. ``fold`` adds only events that are
+not yet recorded, so a daily run pays for new activity while the charts
+cover the full history collected so far. Commit sentiment counts the
+polarities ``sentiment.score`` keeps per commit SHA.
+"""
+
+import re
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import lru_cache
+from itertools import pairwise
+from operator import itemgetter
+
+import sentiment
+from store import TOP_REPOS
+
+
+def _commit_time(row):
+    dt = datetime.fromisoformat(row["authored_at"].replace("Z", "+00:00"))
+    return [(f"{dt.weekday()}:{dt.hour}", 1)]
+
+
+def _sentiment(row):
+    polarity = row["polarity"]
+    if polarity > 0.1:
+        return [("positive", 1)]
+    if polarity < -0.1:
+        return [("negative", 1)]
+    return [("neutral", 1)]
+
+
+# Tokens as WordCloud.process_text splits them
+WORD = re.compile(r"\w[\w']*")
+
+
+@lru_cache(maxsize=None)
+def _stopwords():
+    from wordcloud import STOPWORDS
+
+    return frozenset(word.lower() for word in STOPWORDS)
+
+
+def _commit_words(row):
+    """Words and word pairs of one message, filtered like ``WordCloud.process_text``."""
+    stopwords = _stopwords()
+    words = [word[:-2] if word.lower().endswith("'s") else word for word in WORD.findall(row["message"] or "")]
+    words = [word for word in words if not word.isdigit()]
+    counts = Counter(word for word in words if word.lower() not in stopwords)
+    # Pairs are keyed "first second" and later kept where they are collocations
+    counts.update(
+        " ".join(pair) for pair in pairwise(words) if not any(word.lower() in stopwords for word in pair)
+    )
+    return list(counts.items())
+
+
+# metric -> (SQL yielding repo, id and fields of every event, event -> [(key, amount)])
+METRICS = {
+    "commit_times": (
+        "SELECT repo, sha AS id, authored_at FROM commits WHERE position IS NOT NULL",
+        _commit_time,
+    ),
+    "commit_sentiment": (
+        "SELECT c.repo, c.sha AS id, p.polarity FROM commits c JOIN commit_polarity p ON p.sha = c.sha "
+        "WHERE c.position IS NOT NULL",
+        _sentiment,
+    ),
+    "commit_words": (
+        "SELECT repo, sha AS id, message FROM commits WHERE position IS NOT NULL",
+        _commit_words,
+    ),
+    "commit_files": (
+        "SELECT f.repo, f.sha || '/' || f.filename AS id, f.filename FROM commit_files f "
+        "JOIN commits c ON c.repo = f.repo AND c.sha = f.sha WHERE c.position IS NOT NULL",
+        lambda row: [(row["filename"], 1)],
+    ),
+    "churn": (
+        "SELECT repo, sha AS id, additions, deletions FROM commits WHERE position IS NOT NULL AND additions IS NOT NULL",
+        lambda row: [("additions", row["additions"]), ("deletions", row["deletions"])],
+    ),
+}
+
+
+def fold(store):
+    """Add every event not yet counted to its metric's totals."""
+    sentiment.score(store)
+    for metric, (events, contributions) in METRICS.items():
+        new = store.query(
+            f"SELECT * FROM ({events}) e WHERE NOT EXISTS "
+            f"(SELECT 1 FROM aggregate_events a WHERE a.metric = ? AND a.repo = e.repo AND a.event_id = e.id)",
+            metric,
+        )
+        totals = Counter()
+        for row in new:
+            for key, amount in contributions(row):
+                totals[(row["repo"], key)] += amount
+        store.db.executemany(
+            "INSERT INTO aggregate_counts (metric, repo, key, value) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (metric, repo, key) DO UPDATE SET value = value + excluded.value",
+            [(metric, repo, key, amount) for (repo, key), amount in totals.items()],
+        )
+        store.db.executemany(
+            "INSERT INTO aggregate_events (metric, repo, event_id) VALUES (?, ?, ?)",
+            [(metric, row["repo"], row["id"]) for row in new],
+        )
+    store.commit()
+
+
+def reset(store, repo):
+    """Forget everything counted for ``repo``, e.g. before its history is reloaded."""
+    store.db.execute("DELETE FROM aggregate_counts WHERE repo = ?", (repo,))
+    store.db.execute("DELETE FROM aggregate_events WHERE repo = ?", (repo,))
+
+
+def totals(store, metric, repos):
+    """Totals of ``metric`` summed over the first ``repos`` repositories."""
+    return Counter({
+        row["key"]: row["value"]
+        for row in store.query(
+            f"SELECT key, SUM(value) AS value FROM aggregate_counts WHERE metric = ? AND repo IN ({TOP_REPOS}) "
+            f"GROUP BY key ORDER BY MIN(rowid)",
+            metric, repos,
+        )
+    })
+
+
+def labels(store, repos):
+    """Issue and pull request label counts over the first ``repos`` repositories.
+
+    Labels are removed as well as added, so they are counted from ``labels``
+    as it stands instead of being folded into running totals.
+    """
+    return Counter({
+        row["name"]: row["count"]
+        for row in store.query(
+            "SELECT l.name, COUNT(*) AS count FROM labels l "
+            "LEFT JOIN issues i ON i.repo = l.repo AND i.number = l.number "
+            "LEFT JOIN pulls p ON p.repo = l.repo AND p.number = l.number "
+            f"WHERE l.repo IN ({TOP_REPOS}) AND (NOT i.is_pull_request OR p.number IS NOT NULL) "
+            "GROUP BY l.name ORDER BY MIN(l.rowid)",
+            repos,
+        )
+    })
+
+
+def commit_times(store, repos):
+    """7×24 matrix of commit counts by weekday (Monday first) and UTC hour."""
+    counts = totals(store, "commit_times", repos)
+    return [[counts.get(f"{day}:{hour}", 0) for hour in range(24)] for day in range(7)]
+
+
+def _fuse(counts):
+    """``wordcloud.tokenization.process_tokens`` over word totals instead of a word list.
+
+    Returns the counts keyed by each word's most common casing, with plurals
+    folded into their singular, and the casing chosen for each lower-case word.
+    """
+    cases = defaultdict(Counter)
+    for word, count in counts.items():
+        cases[word.lower()][word] += count
+    plurals = {}
+    for key in list(cases):
+        if key.endswith("s") and not key.endswith("ss") and key[:-1] in cases:
+            for word, count in cases.pop(key).items():
+                cases[key[:-1]][word[:-1]] += count
+            plurals[key] = key[:-1]
+    fused, standard = {}, {}
+    for key, case in cases.items():
+        first = max(case.items(), key=itemgetter(1))[0]
+        fused[first] = sum(case.values())
+        standard[key] = first
+    for plural, singular in plurals.items():
+        standard[plural] = standard[singular]
+    return fused, standard
+
+
+def commit_words(store, repos, collocation_threshold=30):
+    """Word cloud frequencies of the commit messages of the first ``repos`` repositories.
+
+    Matches ``WordCloud(...).process_text`` over the messages, except that
+    word pairs never span two messages.
+    """
+    from wordcloud.tokenization import score
+
+    counts = totals(store, "commit_words", repos)
+    words = {word: count for word, count in counts.items() if " " not in word}
+    unigrams, standard = _fuse(words)
+    bigrams, _ = _fuse({pair: count for pair, count in counts.items() if " " in pair})
+    n_words = sum(words.values())
+
+    frequencies = dict(unigrams)
+    for bigram, count in bigrams.items():
+        first, second = (standard[word.lower()] for word in bigram.split(" "))
+        if score(count, unigrams[first], unigrams[second], n_words) > collocation_threshold:
+            frequencies[first] -= count
+            frequencies[second] -= count
+            frequencies[bigram] = count
+    return {word: count for word, count in frequencies.items() if count > 0}
@@ -1,52 +1,88 @@
-"""Shared visual style for every dashboard chart."""
+"""Shared visual style for every dashboard chart.
 
+Charts are drawn on figures from ``new_figure`` and written with ``save``,
+which applies the finishing rules; nothing here touches pyplot's global
+figure state. A ``Manifest`` per output directory remembers what data each
+PNG was drawn from, so generators only redraw charts whose inputs changed.
+matplotlib is imported, and the theme applied, by the first ``new_figure``,
+so a run with nothing to redraw never loads it.
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+from importlib.metadata import version
 from pathlib import Path
 from textwrap import shorten
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-
 
 CANVAS = "#0d1117"
 INK = "#f0f6fc"
 MUTED = "#8b949e"
 PRIMARY = "#8b5cf6"
 PALETTE = [PRIMARY, "#22d3ee", "#34d399", "#fbbf24", "#f472b6", "#60a5fa"]
+MANIFEST = "_fingerprints.json"
+# Redraw every chart even when its fingerprint is unchanged
+FORCE_RENDER = os.environ.get("DASHBOARD_FORCE_RENDER", "").lower() in ("1", "true", "yes")
+# Every chart a Manifest checked in this process: id, drawing seconds, skipped
+RENDERED = []
+# Chart ids ("<generator>.<chart>") to draw; None draws every chart
+SELECTED = None
+
+
+@lru_cache(maxsize=None)
+def _theme():
+    """Import matplotlib and apply the dashboard theme, once per process."""
+    import matplotlib as mpl
+
+    mpl.rcParams.update(
+        {
+            "axes.facecolor": CANVAS,
+            "axes.labelcolor": MUTED,
+            "axes.prop_cycle": mpl.cycler(color=PALETTE),
+            "axes.titlecolor": INK,
+            "axes.titlelocation": "left",
+            "axes.titlepad": 16,
+            "axes.titlesize": 16,
+            "axes.titleweight": "bold",
+            "figure.facecolor": CANVAS,
+            "font.family": "DejaVu Sans",
+            "font.size": 10,
+            "grid.color": "#30363d",
+            "grid.linewidth": 0.8,
+            "legend.facecolor": CANVAS,
+            "legend.frameon": False,
+            "legend.labelcolor": MUTED,
+            "savefig.dpi": 160,
+            "savefig.facecolor": CANVAS,
+            "savefig.pad_inches": 0.18,
+            "text.color": INK,
+            "xtick.color": MUTED,
+            "ytick.color": MUTED,
+        }
+    )
+
 
-mpl.rcParams.update(
-    {
-        "axes.facecolor": CANVAS,
-        "axes.labelcolor": MUTED,
-        "axes.prop_cycle": mpl.cycler(color=PALETTE),
-        "axes.titlecolor": INK,
-        "axes.titlelocation": "left",
-        "axes.titlepad": 16,
-        "axes.titlesize": 16,
-        "axes.titleweight": "bold",
-        "figure.facecolor": CANVAS,
-        "font.family": "DejaVu Sans",
-        "font.size": 10,
-        "grid.color": "#30363d",
-        "grid.linewidth": 0.8,
-        "legend.facecolor": CANVAS,
-        "legend.frameon": False,
-        "legend.labelcolor": MUTED,
-        "savefig.dpi": 160,
-        "savefig.facecolor": CANVAS,
-        "savefig.pad_inches": 0.18,
-        "text.color": INK,
-        "xtick.color": MUTED,
-        "ytick.color": MUTED,
-    }
-)
-
-
-_savefig = plt.savefig
-
-
-def _polish_and_save(filename, *args, **kwargs):
-    """Polish the active figure immediately before it is written."""
-    figure = plt.gcf()
+def new_figure(figsize=(8, 4), nrows=1, ncols=1, **kwargs):
+    """Create a themed figure on its own Agg canvas, outside pyplot.
+
+    Returns ``(figure, axes)`` like ``plt.subplots``. The figure is never
+    registered with pyplot's figure manager, so figures can be built from
+    several threads at once and need no ``plt.close``.
+    """
+    _theme()
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize, **kwargs)
+    FigureCanvasAgg(figure)
+    return figure, figure.subplots(nrows, ncols)
+
+
+def polish(figure):
+    """Apply the dashboard's finishing rules to every axis of ``figure``."""
     for axis in figure.axes:
         axis.set_axisbelow(True)
         bars = [patch for patch in axis.patches if hasattr(patch, "get_width")]
@@ -73,12 +109,86 @@ def _polish_and_save(filename, *args, **kwargs):
                 patch.set_alpha(0.95)
                 patch.set_linewidth(0)
 
+
+def save(figure, filename, **kwargs):
+    """Polish ``figure`` and write it to ``filename``."""
+    polish(figure)
     kwargs.setdefault("bbox_inches", "tight")
     kwargs.setdefault("dpi", 160)
     kwargs.setdefault("facecolor", CANVAS)
     path = Path(filename)
+    if path.suffix == ".png":
+        # No "Software" stamp, so the same chart always encodes to the same bytes
+        kwargs.setdefault("metadata", {"Software": None})
     path.parent.mkdir(parents=True, exist_ok=True)
-    return _savefig(path, *args, **kwargs)
+    figure.savefig(path, **kwargs)
+
+
+def select(charts):
+    """Draw only the chart ids in ``charts`` from now on, or every chart for ``None``."""
+    global SELECTED
+    SELECTED = None if charts is None else set(charts)
+
+
+def _plain(value):
+    """``value`` as JSON-ready lists, keeping dict order and non-string keys."""
+    if isinstance(value, dict):
+        return [[_plain(key), _plain(item)] for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Manifest:
+    """Fingerprints of the data behind each chart of one output directory.
+
+    A fingerprint hashes a chart's inputs together with the generator's and
+    this module's source, and is kept in ``MANIFEST`` next to the PNGs:
+
+        charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+        if charts.stale("repo_growth.png", results["years"]):
+            fig, ax = chart_style.new_figure()
+            ...
+            charts.save(fig, "repo_growth.png")
+    """
+
+    def __init__(self, directory, source):
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST
+        self.generator = Path(source).stem.removeprefix("generate_")
+        code = hashlib.sha256(Path(source).read_bytes() + Path(__file__).read_bytes())
+        code.update(version("matplotlib").encode())
+        self.code = code.hexdigest()
+        try:
+            self.fingerprints = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):
+            self.fingerprints = {}
+        self.pending = {}
+
+    def _chart(self, filename):
+        return f"{self.generator}.{Path(filename).stem}"
 
+    def stale(self, filename, *inputs):
+        """Whether ``filename`` must be redrawn from ``inputs`` (never when not ``select``ed)."""
+        if SELECTED is not None and self._chart(filename) not in SELECTED:
+            return False
+        data = json.dumps([self.code, _plain(inputs)], default=str)
+        fingerprint = hashlib.sha256(data.encode()).hexdigest()
+        stale = (
+            FORCE_RENDER
+            or self.fingerprints.get(filename) != fingerprint
+            or not (self.directory / filename).exists()
+        )
+        if stale:
+            self.pending[filename] = (fingerprint, time.perf_counter())
+        else:
+            RENDERED.append({"chart": self._chart(filename), "seconds": 0.0, "skipped": True})
+        return stale
 
-plt.savefig = _polish_and_save
+    def save(self, figure, filename, **kwargs):
+        """``save`` the chart checked with ``stale`` and record its fingerprint."""
+        save(figure, self.directory / filename, **kwargs)
+        fingerprint, started = self.pending.pop(filename)
+        self.fingerprints[filename] = fingerprint
+        RENDERED.append({"chart": self._chart(filename), "seconds": round(time.perf_counter() - started, 4), "skipped": False})
+        self.path.write_text(json.dumps(self.fingerprints, indent=2, sort_keys=True) + "\n")
@@ -0,0 +1,228 @@
+"""GitHub data shared by every generator during one dashboard run.
+
+A ``Dataset`` lists the user's repositories once and memoizes every
+per-repository resource it fetches, so generators that read the same
+commits or pull requests share one result instead of re-fetching it.
+Requests that name the same listing differently share it too: commits of
+the default branch are one listing whether or not the branch is named.
+Commit details and the reviews of merged pull requests are final; they are
+kept in an ``EntityStore`` and never requested again.
+"""
+
+import os
+from urllib.parse import quote
+
+import git_mirror
+import github_api
+from entities import EntityStore
+
+
+API = github_api.API_URL
+TOPICS_ACCEPT = "application/vnd.github.mercy-preview+json"
+# GitHub answers 409 for the commits of a repository with no commits yet
+EMPTY_REPO = (409,)
+
+
+class Dataset:
+    """Lazily fetched, memoized view of one GitHub user's data."""
+
+    def __init__(self, username, token):
+        self.username = username
+        self.token = token
+        self.headers = {"Authorization": f"token {token}", "Accept": "application/vnd.github+json"}
+        self._memo = {}
+        self.entities = EntityStore()
+
+    @classmethod
+    def from_env(cls):
+        repo_env = os.environ.get("GITHUB_REPOSITORY")
+        if not repo_env:
+            raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
+        token = os.environ.get("GH_TOKEN")
+        if not token:
+            raise RuntimeError("GH_TOKEN environment variable not set")
+        return cls(repo_env.split("/")[0], token)
+
+    def _once(self, key, load):
+        if key not in self._memo:
+            self._memo[key] = load()
+        return self._memo[key]
+
+    def _list(self, url, **kwargs):
+        key = (url, tuple(sorted(kwargs.items())))
+        return self._once(key, lambda: list(github_api.paginate(url, headers=self.headers, **kwargs)))
+
+    def _repo_url(self, repo, path=""):
+        return f"{API}/repos/{self.username}/{repo}{path}"
+
+    def _default_branch(self, repo):
+        return next((record.get("default_branch") for record in self.repos if record["name"] == repo), None)
+
+    # -- user level -----------------------------------------------------
+
+    @property
+    def repos(self):
+        """Every repository owned by the user, in the API's default order."""
+        return self._list(f"{API}/users/{self.username}/repos")
+
+    def user(self):
+        return self._once("user", lambda: github_api.get_json(f"{API}/users/{self.username}", headers=self.headers))
+
+    def orgs(self):
+        return self._list(f"{API}/users/{self.username}/orgs")
+
+    def starred(self):
+        return self._list(f"{API}/users/{self.username}/starred")
+
+    # -- repository level -----------------------------------------------
+
+    def commits(self, repo, sha=None):
+        """Commits on the default branch (or ``sha``)."""
+        if sha and sha != self._default_branch(repo):
+            return self._list(self._repo_url(repo, f"/commits?sha={quote(sha, safe='')}"), empty_on=EMPTY_REPO)
+        return self._list(self._repo_url(repo, "/commits"), empty_on=EMPTY_REPO)
+
+    def new_commits(self, repo, listed):
+        """Commits on the default branch that are not in ``listed``, newest first.
+
+        The listing is read until every new commit's parents are listed or
+        read, which takes in commits merged with older dates (``since=``
+        filters on the commit date and would drop them) and requests no
+        page past the point where the new history joins the old.
+        """
+        new, pending = [], set()
+        for commit in github_api.paginate(self._repo_url(repo, "/commits"), headers=self.headers, empty_on=EMPTY_REPO):
+            pending.discard(commit["sha"])
+            if commit["sha"] not in listed:
+                new.append(commit)
+                pending.update(p["sha"] for p in commit.get("parents", []) if p["sha"] not in listed)
+            if not pending:
+                break
+        return new
+
+    def branches(self, repo):
+        return self._list(self._repo_url(repo, "/branches"))
+
+    def contributors(self, repo):
+        return self._list(self._repo_url(repo, "/contributors"))
+
+    def pulls(self, repo, state="all"):
+        return self._list(self._repo_url(repo, f"/pulls?state={state}"))
+
+    def updated_pulls(self, repo, after):
+        """Pull requests of any state updated at or after ``after``, most recent first."""
+        url = self._repo_url(repo, "/pulls?state=all&sort=updated&direction=desc")
+        return self._list(url, floor=after, date_field="updated_at")
+
+    def issues(self, repo, since=None):
+        """Issues and pull requests, as the issues endpoint returns both."""
+        return self._list(self._repo_url(repo, "/issues?state=all"), since=since)
+
+    def workflow_runs(self, repo, created_after=None):
+        path = "/actions/runs"
+        if created_after:
+            path += f"?created={quote('>=' + created_after, safe='')}"
+        return self._list(self._repo_url(repo, path), items_key="workflow_runs")
+
+    def compare(self, repo, base, head):
+        """``ahead_by`` and ``behind_by`` commit counts of ``head`` against ``base``.
+
+        Empty when GitHub cannot compare them, e.g. for unrelated histories;
+        any other failure raises ``requests.HTTPError``.
+        """
+        def load():
+            url = self._repo_url(repo, f"/compare/{quote(base, safe='')}...{quote(head, safe='')}")
+            response = github_api.fetch(url, headers=self.headers, params={"per_page": 1})
+            if response.status_code == 404:
+                return {}
+            github_api.raise_for_status(response, url)
+            return {"ahead_by": response.body["ahead_by"], "behind_by": response.body["behind_by"]}
+
+        return self._once(("compare", repo, base, head), load)
+
+    def languages(self, repo):
+        """Bytes of code per language for a repository record, or None if the request failed."""
+        def load():
+            response = github_api.fetch(repo["languages_url"], headers=self.headers)
+            return response.body if response.status_code == 200 and isinstance(response.body, dict) else None
+
+        return self._once(("languages", repo["name"]), load)
+
+    def topics(self, repo):
+        """Topic names of a repository record, or None if the request failed."""
+        def load():
+            url = self._repo_url(repo["name"], "/topics")
+            response = github_api.fetch(url, headers={**self.headers, "Accept": TOPICS_ACCEPT})
+            if response.status_code != 200 or not isinstance(response.body, dict):
+                return None
+            return response.body.get("names", [])
+
+        return self._once(("topics", repo["name"]), load)
+
+    def mirror(self, repo):
+        """Path of the up-to-date local git mirror of a repository record, or None.
+
+        None when mirrors are off, the record has no clone URL, or git fails;
+        callers then fall back to the API.
+        """
+        def load():
+            if not git_mirror.ENABLED or not repo.get("clone_url"):
+                return None
+            try:
+                return git_mirror.sync(repo["name"], repo["clone_url"], self.token)
+            except git_mirror.MirrorError as exc:
+                print(f"⚠️ git mirror of {repo['name']} failed ({exc}); its commit stats come from the API")
+                return None
+
+        return self._once(("mirror", repo["name"]), load)
+
+    # -- per-item fan-out -----------------------------------------------
+
+    def commit_details(self, repo, shas, **kwargs):
+        """Commit ``stats``, ``files`` and ``commit`` author date and message, in ``shas`` order."""
+        details = {sha: self.entities.get("commit", sha) for sha in shas}
+        missing = [sha for sha, detail in details.items() if detail is None]
+        urls = [self._repo_url(repo, f"/commits/{sha}") for sha in missing]
+        for sha, response in zip(missing, github_api.fetch_many(urls, headers=self.headers, responses=True, **kwargs)):
+            detail = response.body if response is not None and response.status_code == 200 else None
+            # Only a real detail is final; errors are asked again next time
+            if not isinstance(detail, dict) or detail.get("sha") != sha:
+                details[sha] = {}
+                continue
+            details[sha] = _commit_summary(detail)
+            self.entities.put("commit", sha, details[sha])
+        return [details[sha] for sha in shas]
+
+    def reviews(self, pulls, **kwargs):
+        """Review lists for each pull request, in ``pulls`` order; None where the listing failed."""
+        reviews = [self.entities.get("reviews", pr["url"]) if pr.get("merged_at") else None for pr in pulls]
+        missing = [index for index, found in enumerate(reviews) if found is None]
+        urls = [pulls[index]["url"] + "/reviews" for index in missing]
+        fetched = github_api.fetch_many(urls, headers=self.headers, pages=True, responses=True, **kwargs)
+        for index, response in zip(missing, fetched):
+            if response is None or response.status_code != 200 or not isinstance(response.body, list):
+                continue
+            reviews[index] = [_review_summary(review) for review in response.body]
+            if pulls[index].get("merged_at"):
+                self.entities.put("reviews", pulls[index]["url"], reviews[index])
+        return reviews
+
+
+def _commit_summary(detail):
+    """The fields of a ``/commits/{sha}`` body the store keeps; patches are dropped."""
+    commit = detail.get("commit") or {}
+    return {
+        "sha": detail.get("sha"),
+        "stats": detail.get("stats") or {},
+        "files": [{"filename": f["filename"]} for f in detail.get("files", [])],
+        "commit": {"author": {"date": (commit.get("author") or {}).get("date")}, "message": commit.get("message")},
+    }
+
+
+def _review_summary(review):
+    return {
+        "id": review["id"],
+        "user": {"login": (review.get("user") or {}).get("login")},
+        "state": review.get("state"),
+        "submitted_at": review.get("submitted_at"),
+    }
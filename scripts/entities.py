@@ -0,0 +1,122 @@
+"""Compressed, append-only store of GitHub entities that no longer change.
+
+A commit is addressed by its SHA, so its details never change. The reviews
+of a merged pull request are treated as final too. Once such an entity is
+in the store, ``Dataset`` answers from it and skips the network, including
+the 304 revalidation the response cache would still send. That includes
+full re-syncs, which would otherwise fetch every detail again.
+
+Entities live in ``ENTITY_DIR`` (``.cache/entities`` by default) as two
+files:
+
+* ``entities.pack``: zlib-compressed JSON records, appended as they arrive;
+* ``entities.idx``: fixed-size ``(key digest, offset, length)`` records
+  sorted by digest. It is memory-mapped and binary-searched, so a lookup
+  reads a few index pages and one record instead of loading the store.
+
+New records are indexed in memory until ``flush`` merges them into a fresh
+index file, which replaces the old one atomically. Records appended by a
+run that never flushed are simply unreachable.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+
+ENTITY_DIR = Path(os.environ.get("DASHBOARD_ENTITY_DIR", ".cache/entities"))
+# SHA-1 of "kind:key", byte offset in the pack, compressed length
+RECORD = struct.Struct(">20sQI")
+
+
+class EntityStore:
+    """Final entities by ``(kind, key)``, e.g. ``("commit", sha)``."""
+
+    def __init__(self, directory=ENTITY_DIR):
+        self.directory = Path(directory)
+        self.pack_path = self.directory / "entities.pack"
+        self.index_path = self.directory / "entities.idx"
+        self._index = None
+        self._pack = None
+        self._new = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(kind, key):
+        return hashlib.sha1(f"{kind}:{key}".encode()).digest()
+
+    def _mapped(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, "rb") as file:
+                    self._index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):  # ValueError: empty file
+                self._index = b""
+        return self._index
+
+    def _find(self, digest):
+        if digest in self._new:
+            return self._new[digest]
+        index = self._mapped()
+        low, high = 0, len(index) // RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            found, offset, length = RECORD.unpack_from(index, middle * RECORD.size)
+            if found == digest:
+                return offset, length
+            if found < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get(self, kind, key):
+        """The stored entity, or None."""
+        with self._lock:
+            location = self._find(self._digest(kind, key))
+            if location is None:
+                return None
+            offset, length = location
+            if self._pack is not None:
+                self._pack.flush()
+            with open(self.pack_path, "rb") as pack:
+                data = os.pread(pack.fileno(), length, offset)
+        return json.loads(zlib.decompress(data))
+
+    def put(self, kind, key, value):
+        """Store ``value`` unless an entity with this key is already stored."""
+        digest = self._digest(kind, key)
+        data = zlib.compress(json.dumps(value, separators=(",", ":")).encode(), 6)
+        with self._lock:
+            if self._find(digest) is not None:
+                return
+            if self._pack is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._pack = open(self.pack_path, "ab")
+            offset = self._pack.seek(0, os.SEEK_END)
+            self._pack.write(data)
+            self._new[digest] = (offset, len(data))
+
+    def flush(self):
+        """Write the pack to disk and merge new records into the index."""
+        with self._lock:
+            if not self._new:
+                return
+            self._pack.flush()
+            os.fsync(self._pack.fileno())
+            index = self._mapped()
+            records = [RECORD.unpack_from(index, start) for start in range(0, len(index), RECORD.size)]
+            records.extend((digest, offset, length) for digest, (offset, length) in self._new.items())
+            records.sort()
+            tmp = self.index_path.with_suffix(".tmp")
+            tmp.write_bytes(b"".join(RECORD.pack(*record) for record in records))
+            if isinstance(index, mmap.mmap):
+                index.close()
+            os.replace(tmp, self.index_path)
+            self._index = None
+            self._new.clear()
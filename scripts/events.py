@@ -0,0 +1,75 @@
+"""Columnar table of the timestamped events the charts bucket by time.
+
+``frame`` loads commits (by ``authored_at``), pull requests and issues (by
+``created_at``) of the first N repositories into one pandas DataFrame. Each
+repository's timestamps of one kind arrive from SQLite as a single string
+of fixed-width ``YYYY-MM-DDTHH:MM:SS`` stamps (the store keeps GitHub's UTC
+``...Z`` form), which NumPy parses in one pass, so no Python object is made
+per event. The helpers below bucket whole columns with NumPy and pandas
+instead of looping over records; both are imported on first use.
+"""
+
+
+# kind -> SQL yielding the repo and timestamp of each event
+EVENTS = {
+    "commit": "SELECT repo, authored_at AS at FROM commits WHERE position IS NOT NULL",
+    "pull": "SELECT repo, created_at AS at FROM pulls",
+    "issue": "SELECT repo, created_at AS at FROM issues WHERE NOT is_pull_request",
+}
+
+
+def frame(store, repos, kinds=tuple(EVENTS)):
+    """Events of ``kinds`` in the first ``repos`` repositories: kind, repo and UTC ``at``."""
+    import numpy as np
+    import pandas as pd
+
+    parts = []
+    for kind in kinds:
+        for repo in store.top_repos(repos):
+            # Fixed-width "YYYY-MM-DDTHH:MM:SS" stamps, so a shorter one cannot shift every later one
+            stamps = store.scalar(
+                f"SELECT group_concat(substr(e.at, 1, 19), '') FROM ({EVENTS[kind]}) e "
+                f"WHERE e.repo = ? AND e.at IS NOT NULL AND length(e.at) >= 19",
+                repo,
+            )
+            if stamps:
+                parts.append((kind, repo, np.frombuffer(stamps.encode("ascii"), dtype="S19").astype("datetime64[s]")))
+    sizes = [len(at) for _, _, at in parts]
+    at = np.concatenate([np.array([], dtype="datetime64[s]")] + [at for _, _, at in parts])
+    return pd.DataFrame({
+        "kind": pd.Categorical(np.repeat(np.array([kind for kind, _, _ in parts], dtype=object), sizes), categories=kinds),
+        "repo": np.repeat(np.array([repo for _, repo, _ in parts], dtype=object), sizes),
+        "at": pd.DatetimeIndex(at.astype("datetime64[ns]")).tz_localize("UTC"),
+    })
+
+
+def days(at):
+    """UTC calendar day of every timestamp in ``at``, as ``datetime64[D]``."""
+    return at.dt.tz_convert(None).to_numpy().astype("datetime64[D]")
+
+
+def streaks(at):
+    """Longest and most recent run of consecutive UTC days with an event in ``at``."""
+    import numpy as np
+
+    active = np.unique(days(at))
+    if not len(active):
+        return 0, 0
+    ends = np.flatnonzero(np.diff(active) != np.timedelta64(1, "D"))
+    runs = np.diff(np.concatenate(([-1], ends, [len(active) - 1])))
+    return int(runs.max()), int(runs[-1])
+
+
+def per_day(events, weights):
+    """Weighted event count per UTC day, with ``weights`` per kind, e.g. ``{"pull": 2}``."""
+    import numpy as np
+
+    kinds = events["kind"].cat
+    score = np.array([weights.get(kind, 0) for kind in kinds.categories])[kinds.codes]
+    day = days(events["at"]).astype(np.int64)
+    if not len(day):
+        return {}
+    first = day.min()
+    totals = np.bincount(day - first, weights=score)
+    active = np.flatnonzero(totals)
+    return dict(zip((active + first).astype("datetime64[D]").tolist(), totals[active].astype(int).tolist()))
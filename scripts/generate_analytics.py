@@ -15,209 +15,194 @@ Requirements:
     pip install requests matplotlib pandas seaborn
 """
 
-import os
-import requests
 from pathlib import Path
-from datetime import timezone
 from utils.time import utc_now, parse_github_timestamp
-import matplotlib.pyplot as plt
-import seaborn as sns
-import chart_style  # noqa: F401 - applies the shared dashboard theme
-import pandas as pd
+import chart_style
+import aggregates
+from ingest import load_store, needed_sources
 from collections import Counter
 
-# -------------------------------
-# 0️⃣ Configuration
-# -------------------------------
-#USERNAME = "your-username"  # Replace with your GitHub username
-
-repo = os.environ.get("GITHUB_REPOSITORY")
-
-if not repo:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-
-USERNAME = repo.split("/")[0]
-
-TOKEN = os.environ.get("GH_TOKEN")  # GitHub token stored in Actions secrets
-HEADERS = {"Authorization": f"token {TOKEN}"}
-
-#OUTPUT_DIR = Path("../metrics/analytics")
-#OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 OUTPUT_DIR = Path("metrics/analytics")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-
-# Fetch repositories (top 10 for performance)
-repos = requests.get(f"https://api.github.com/users/{USERNAME}/repos", headers=HEADERS).json()[:10]
-
-# -------------------------------
-# 1️⃣ Churn Rate (lines added vs deleted)
-# -------------------------------
-lines_added = 0
-lines_deleted = 0
-
-for repo in repos:
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    for c in commits:
-        sha = c["sha"]
-        commit_detail = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits/{sha}", headers=HEADERS).json()
-        stats = commit_detail.get("stats", {})
-        lines_added += stats.get("additions", 0)
-        lines_deleted += stats.get("deletions", 0)
-
-plt.figure(figsize=(6,4))
-plt.bar(["Lines Added","Lines Deleted"], [lines_added, lines_deleted], color=["green","red"])
-plt.title("Churn Rate")
-plt.savefig(OUTPUT_DIR / "churn_rate.png")
-plt.close()
-
-# -------------------------------
-# 2️⃣ Repo Health Index
-# Metrics: open issues ratio, PR merge ratio, last commit recency
-# -------------------------------
-repo_health = {}
-for repo in repos:
-    repo_name = repo["name"]
-    # Open Issues
-    open_issues = repo.get("open_issues_count",0)
-    # PRs
-    prs = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo_name}/pulls?state=all", headers=HEADERS).json()
-    merged = sum(1 for pr in prs if pr.get("merged_at"))
-    total_prs = len(prs)
-    merge_ratio = merged / total_prs if total_prs > 0 else 0
-    # Last commit recency in days
-    last_commit_date = parse_github_timestamp(repo["pushed_at"])
-    days_since_last_commit = (utc_now() - last_commit_date).days
-
-
-    repo_health[repo_name] = {
-        "open_issues": open_issues,
-        "merge_ratio": merge_ratio,
-        "days_since_last_commit": days_since_last_commit
+
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "churn_rate": ("commits",),
+    "repo_health_index": ("pulls",),
+    "tech_stack_evolution": ("languages", "commits"),
+    "commit_hot_times": ("commits",),
+    "pr_issue_topics": ("issues", "pulls"),
+    "avg_contributors": ("contributors",),
+    "open_source_impact": ("repos",),
+}
+
+
+def collect(store):
+    """Gather every analytical figure from the local store."""
+    # Repositories (top 10 for performance)
+    repos = store.query("SELECT * FROM repos ORDER BY position LIMIT 10")
+
+    # -------------------------------
+    # 1️⃣ Churn Rate (lines added vs deleted)
+    # -------------------------------
+    churn = aggregates.totals(store, "churn", 10)
+    lines_added, lines_deleted = churn["additions"], churn["deletions"]
+
+    # -------------------------------
+    # 2️⃣ Repo Health Index
+    # Metrics: open issues ratio, PR merge ratio, last commit recency
+    # -------------------------------
+    repo_health = {}
+    for repo in repos:
+        repo_name = repo["name"]
+        # Open Issues
+        open_issues = repo["open_issues_count"]
+        # PRs
+        prs = store.query("SELECT COUNT(merged_at), COUNT(*) FROM pulls WHERE repo = ?", repo_name)[0]
+        merged, total_prs = prs[0], prs[1]
+        merge_ratio = merged / total_prs if total_prs > 0 else 0
+        # Last commit recency in days
+        last_commit_date = parse_github_timestamp(repo["pushed_at"])
+        days_since_last_commit = (utc_now() - last_commit_date).days
+
+        repo_health[repo_name] = {
+            "open_issues": open_issues,
+            "merge_ratio": merge_ratio,
+            "days_since_last_commit": days_since_last_commit
+        }
+
+    # -------------------------------
+    # 3️⃣ Tech Stack Evolution
+    # Timeline of languages used per year (based on first commit year per repo)
+    # -------------------------------
+    lang_over_time = {}
+
+    for repo in repos:
+        first_commit = store.scalar(
+            "SELECT authored_at FROM commits WHERE repo = ? AND position IS NOT NULL ORDER BY position DESC LIMIT 1",
+            repo["name"],
+        )
+        if not first_commit:
+            continue
+        first_commit_date = parse_github_timestamp(first_commit)
+        year = first_commit_date.year
+        for lang, size in store.query("SELECT language, bytes FROM repo_languages WHERE repo = ? ORDER BY rowid", repo["name"]):
+            if year not in lang_over_time:
+                lang_over_time[year] = Counter()
+            lang_over_time[year][lang] += size
+
+    # -------------------------------
+    # 4️⃣ Commit Hot Times (heatmap of productive hours)
+    # -------------------------------
+    heatmap = aggregates.commit_times(store, 10)
+
+    # -------------------------------
+    # 5️⃣ PR & Issue Topic Analysis (count by labels)
+    # -------------------------------
+    label_counter = aggregates.labels(store, 10)
+
+    # -------------------------------
+    # 6️⃣ Average Contributor Count per Repo
+    # -------------------------------
+    contributors = {}
+    for repo in repos:
+        contributors[repo["name"]] = store.scalar("SELECT COUNT(*) FROM contributors WHERE repo = ?", repo["name"])
+
+    # -------------------------------
+    # 7️⃣ Open Source Impact Score (stars + forks + watchers)
+    # -------------------------------
+    impact_score = {}
+    for repo in repos:
+        impact_score[repo["name"]] = repo["stargazers_count"] + repo["forks_count"] + repo["watchers_count"]
+
+    return {
+        "lines_added": lines_added,
+        "lines_deleted": lines_deleted,
+        "repo_health": repo_health,
+        "lang_over_time": {year: dict(counter) for year, counter in lang_over_time.items()},
+        "heatmap": heatmap,
+        "top_labels": dict(label_counter.most_common(10)),
+        "contributors": contributors,
+        "impact_score": impact_score,
     }
 
-# Convert to DataFrame for visualization
-df_health = pd.DataFrame(repo_health).T
-df_health.plot(kind="bar", subplots=True, layout=(1,3), figsize=(12,4), title=["Open Issues","PR Merge Ratio","Days Since Last Commit"])
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "repo_health_index.png")
-plt.close()
-
-# -------------------------------
-# 3️⃣ Tech Stack Evolution
-# Timeline of languages used per year (based on first commit year per repo)
-# -------------------------------
-lang_over_time = {}
-
-for repo in repos:
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    if not commits:
-        continue
-    first_commit_date = parse_github_timestamp(commits[-1]["commit"]["author"]["date"])
-    year = first_commit_date.year
-    langs = requests.get(repo["languages_url"], headers=HEADERS).json()
-    for lang in langs.keys():
-        if year not in lang_over_time:
-            lang_over_time[year] = Counter()
-        lang_over_time[year][lang] += langs[lang]
-
-# Convert to DataFrame
-df_lang = pd.DataFrame(lang_over_time).fillna(0).T
-df_lang.plot(kind="bar", stacked=True, figsize=(10,5))
-plt.title("Tech Stack Evolution Over Years")
-plt.xlabel("Year")
-plt.ylabel("Lines of Code")
-plt.xticks(rotation=45)
-plt.savefig(OUTPUT_DIR / "tech_stack_evolution.png")
-plt.close()
-
-# -------------------------------
-# 4️⃣ Commit Hot Times (heatmap of productive hours)
-# -------------------------------
-hours = []
-weekdays = []
-
-for repo in repos:
-    commits = requests.get(
-        f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits",
-        headers=HEADERS
-    ).json()
-
-    for commit in commits:
-        ts = commit["commit"]["author"]["date"]
-        dt = parse_github_timestamp(ts)
-
-        hours.append(dt.hour)
-        weekdays.append(dt.weekday())
-
-
-# Create heatmap dataframe
-df_heat = pd.DataFrame({"Hour": hours, "Weekday": weekdays})
-heatmap_data = pd.crosstab(df_heat["Weekday"], df_heat["Hour"])
-heatmap_data = heatmap_data.reindex(index=range(7), columns=range(24), fill_value=0)
-plt.figure(figsize=(12,6))
-sns.heatmap(heatmap_data, cmap="mako", linewidths=0.35, linecolor="white", cbar_kws={"label": "Commits"})
-plt.yticks([i + 0.5 for i in range(7)], ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], rotation=0)
-plt.xticks([i + 0.5 for i in range(0, 24, 2)], [f"{i:02d}:00" for i in range(0, 24, 2)], rotation=0)
-plt.xlabel("Hour of day (UTC)")
-plt.ylabel("")
-plt.title("When I Commit")
-plt.savefig(OUTPUT_DIR / "commit_hot_times.png")
-plt.close()
-
-# -------------------------------
-# 5️⃣ PR & Issue Topic Analysis (count by labels)
-# -------------------------------
-label_counter = Counter()
-
-for repo in repos:
-    # Issues
-    issues = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/issues?state=all", headers=HEADERS).json()
-    for i in issues:
-        if "pull_request" not in i:
-            for label in i.get("labels", []):
-                label_counter[label["name"]] += 1
-    # PRs
-    prs = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in prs:
-        for label in pr.get("labels", []):
-            label_counter[label["name"]] += 1
-
-top_labels = dict(label_counter.most_common(10))
-plt.figure(figsize=(8,4))
-plt.bar(top_labels.keys(), top_labels.values(), color="skyblue")
-plt.xticks(rotation=45)
-plt.title("PR & Issue Topic Analysis (Top Labels)")
-plt.savefig(OUTPUT_DIR / "pr_issue_topics.png")
-plt.close()
-
-# -------------------------------
-# 6️⃣ Average Contributor Count per Repo
-# -------------------------------
-contributors = {}
-for repo in repos:
-    contrs = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/contributors", headers=HEADERS).json()
-    contributors[repo["name"]] = len(contrs)
-
-plt.figure(figsize=(8,4))
-plt.bar(contributors.keys(), contributors.values(), color="purple")
-plt.xticks(rotation=45)
-plt.title("Average Contributor Count per Repo")
-plt.savefig(OUTPUT_DIR / "avg_contributors.png")
-plt.close()
-
-# -------------------------------
-# 7️⃣ Open Source Impact Score (stars + forks + watchers)
-# -------------------------------
-impact_score = {}
-for repo in repos:
-    impact_score[repo["name"]] = repo.get("stargazers_count",0) + repo.get("forks_count",0) + repo.get("watchers_count",0)
-
-plt.figure(figsize=(8,4))
-plt.bar(impact_score.keys(), impact_score.values(), color="gold")
-plt.xticks(rotation=45)
-plt.title("Open Source Impact Score")
-plt.savefig(OUTPUT_DIR / "open_source_impact.png")
-plt.close()
-
-print("✅ Ultra-Niche / Analytical metrics generated successfully in metrics/analytics/")
+
+def render(results):
+    """Draw every analytical chart into ``OUTPUT_DIR``."""
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+
+    if charts.stale("churn_rate.png", results["lines_added"], results["lines_deleted"]):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.bar(["Lines Added","Lines Deleted"], [results["lines_added"], results["lines_deleted"]], color=["green","red"])
+        ax.set_title("Churn Rate")
+        charts.save(fig, "churn_rate.png")
+
+    # Convert to DataFrame for visualization
+    if charts.stale("repo_health_index.png", results["repo_health"]):
+        import pandas as pd
+
+        df_health = pd.DataFrame(results["repo_health"]).T
+        fig, axes = chart_style.new_figure(figsize=(12,4), ncols=3)
+        df_health.plot(kind="bar", subplots=True, ax=axes, title=["Open Issues","PR Merge Ratio","Days Since Last Commit"])
+        fig.tight_layout()
+        charts.save(fig, "repo_health_index.png")
+
+    # Convert to DataFrame
+    if charts.stale("tech_stack_evolution.png", results["lang_over_time"]):
+        import pandas as pd
+
+        df_lang = pd.DataFrame(results["lang_over_time"]).fillna(0).T
+        fig, ax = chart_style.new_figure(figsize=(10,5))
+        df_lang.plot(kind="bar", stacked=True, ax=ax)
+        ax.set_title("Tech Stack Evolution Over Years")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Lines of Code")
+        ax.tick_params(axis="x", labelrotation=45)
+        charts.save(fig, "tech_stack_evolution.png")
+
+    # Create heatmap dataframe
+    if charts.stale("commit_hot_times.png", results["heatmap"]):
+        import pandas as pd
+        import seaborn as sns
+
+        heatmap_data = pd.DataFrame(results["heatmap"], index=range(7), columns=range(24))
+        fig, ax = chart_style.new_figure(figsize=(12,6))
+        sns.heatmap(heatmap_data, cmap="mako", linewidths=0.35, linecolor="white", cbar_kws={"label": "Commits"}, ax=ax)
+        ax.set_yticks([i + 0.5 for i in range(7)], ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"], rotation=0)
+        ax.set_xticks([i + 0.5 for i in range(0, 24, 2)], [f"{i:02d}:00" for i in range(0, 24, 2)], rotation=0)
+        ax.set_xlabel("Hour of day (UTC)")
+        ax.set_ylabel("")
+        ax.set_title("When I Commit")
+        charts.save(fig, "commit_hot_times.png")
+
+    top_labels = results["top_labels"]
+    if charts.stale("pr_issue_topics.png", top_labels):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(top_labels.keys(), top_labels.values(), color="skyblue")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_title("PR & Issue Topic Analysis (Top Labels)")
+        charts.save(fig, "pr_issue_topics.png")
+
+    contributors = results["contributors"]
+    if charts.stale("avg_contributors.png", contributors):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(contributors.keys(), contributors.values(), color="purple")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_title("Average Contributor Count per Repo")
+        charts.save(fig, "avg_contributors.png")
+
+    impact_score = results["impact_score"]
+    if charts.stale("open_source_impact.png", impact_score):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(impact_score.keys(), impact_score.values(), color="gold")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_title("Open Source Impact Score")
+        charts.save(fig, "open_source_impact.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ Ultra-Niche / Analytical metrics generated successfully in metrics/analytics/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,132 +1,137 @@
-import os
-import requests
 from pathlib import Path
 from collections import Counter
-from datetime import datetime
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
-
-# -----------------------------
-# Setup
-# -----------------------------
-repo_env = os.environ.get("GITHUB_REPOSITORY")
-if not repo_env:
-    raise RuntimeError("GITHUB_REPOSITORY not set")
-
-USERNAME = repo_env.split("/")[0]
-
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN not set")
-
-HEADERS = {
-    "Authorization": f"token {TOKEN}",
-    "Accept": "application/vnd.github+json"
-}
+import chart_style
+from ingest import load_store, needed_sources
+from utils.time import epoch_seconds
 
 OUTPUT_DIR = Path("metrics/ci_cd")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-repos = requests.get(
-    f"https://api.github.com/users/{USERNAME}/repos?per_page=20",
-    headers=HEADERS
-).json()
-
-# -----------------------------
-# Data collectors
-# -----------------------------
-workflow_counts = Counter()
-trigger_counts = Counter()
-failed_jobs = 0
-auto_merge_enabled = 0
-deployment_times = []
-
-# -----------------------------
-# Iterate repos
-# -----------------------------
-for r in repos:
-    name = r["name"]
-
-    runs_resp = requests.get(
-        f"https://api.github.com/repos/{USERNAME}/{name}/actions/runs?per_page=30",
-        headers=HEADERS
-    ).json()
-
-    for run in runs_resp.get("workflow_runs", []):
-        workflow_counts[name] += 1
-
-        trigger = run.get("event")
-        if trigger:
-            trigger_counts[trigger] += 1
-
-        if run.get("conclusion") == "failure":
-            failed_jobs += 1
-
-        # deployment time
-        if run.get("run_started_at") and run.get("updated_at"):
-            start = datetime.fromisoformat(run["run_started_at"].replace("Z", "+00:00"))
-            end = datetime.fromisoformat(run["updated_at"].replace("Z", "+00:00"))
-            deployment_times.append((end - start).total_seconds() / 60)
-
-    # auto-merge (repo setting)
-    if r.get("allow_auto_merge"):
-        auto_merge_enabled += 1
-
-# -----------------------------
-# 1️⃣ Workflow Runs
-# -----------------------------
-plt.figure(figsize=(8,4))
-plt.bar(workflow_counts.keys(), workflow_counts.values())
-plt.xticks(rotation=45)
-plt.title("Workflow Runs per Repo")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "workflow_runs.png")
-plt.close()
-
-# -----------------------------
-# 2️⃣ Workflow Triggers
-# -----------------------------
-plt.figure(figsize=(6,4))
-plt.bar(trigger_counts.keys(), trigger_counts.values())
-plt.title("Workflow Triggers")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "workflow_triggers.png")
-plt.close()
-
-# -----------------------------
-# 3️⃣ Auto-Merge
-# -----------------------------
-plt.figure(figsize=(4,4))
-plt.bar(["Enabled", "Disabled"], [auto_merge_enabled, len(repos) - auto_merge_enabled])
-plt.title("Auto-Merge Usage")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "auto_merge.png")
-plt.close()
-
-# -----------------------------
-# 4️⃣ Deployment Time
-# -----------------------------
-plt.figure(figsize=(6,4))
-if deployment_times:
-    plt.hist(deployment_times, bins=15)
-else:
-    plt.text(0.5, 0.5, "No deployment data", ha="center", va="center")
-plt.xlabel("Minutes")
-plt.title("Deployment Time")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "deployment_time.png")
-plt.close()
-
-# -----------------------------
-# 5️⃣ Failed Jobs
-# -----------------------------
-plt.figure(figsize=(4,4))
-plt.bar(["Failed Jobs"], [failed_jobs], color="red")
-plt.title("Failed CI Jobs")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "failed_jobs.png")
-plt.close()
-
-print("✅ CI/CD metrics generated successfully")
+
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "workflow_runs": ("runs",),
+    "workflow_triggers": ("runs",),
+    "auto_merge": ("repos",),
+    "deployment_time": ("runs",),
+    "failed_jobs": ("runs",),
+}
+
+
+def collect(store):
+    repos = store.query("SELECT name, allow_auto_merge FROM repos ORDER BY position LIMIT 20")
+
+    # -----------------------------
+    # Data collectors
+    # -----------------------------
+    workflow_counts = Counter()
+    trigger_counts = Counter()
+    failed_jobs = 0
+    auto_merge_enabled = 0
+    deployment_times = []
+
+    # -----------------------------
+    # Iterate repos
+    # -----------------------------
+    for r in repos:
+        name = r["name"]
+
+        for run in store.query(
+            f"SELECT event, conclusion, ({epoch_seconds('updated_at')} - {epoch_seconds('run_started_at')}) / 60.0 "
+            f"AS minutes FROM workflow_runs WHERE repo = ? ORDER BY rowid",
+            name,
+        ):
+            workflow_counts[name] += 1
+
+            trigger = run["event"]
+            if trigger:
+                trigger_counts[trigger] += 1
+
+            if run["conclusion"] == "failure":
+                failed_jobs += 1
+
+            # deployment time
+            if run["minutes"] is not None:
+                deployment_times.append(run["minutes"])
+
+        # auto-merge (repo setting)
+        if r["allow_auto_merge"]:
+            auto_merge_enabled += 1
+
+    return {
+        "workflow_counts": dict(workflow_counts),
+        "trigger_counts": dict(trigger_counts),
+        "failed_jobs": failed_jobs,
+        "auto_merge_enabled": auto_merge_enabled,
+        "auto_merge_disabled": len(repos) - auto_merge_enabled,
+        "deployment_times": deployment_times,
+    }
+
+
+def render(results):
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+
+    # -----------------------------
+    # 1️⃣ Workflow Runs
+    # -----------------------------
+    workflow_counts = results["workflow_counts"]
+    if charts.stale("workflow_runs.png", workflow_counts):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(workflow_counts.keys(), workflow_counts.values())
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_title("Workflow Runs per Repo")
+        fig.tight_layout()
+        charts.save(fig, "workflow_runs.png")
+
+    # -----------------------------
+    # 2️⃣ Workflow Triggers
+    # -----------------------------
+    trigger_counts = results["trigger_counts"]
+    if charts.stale("workflow_triggers.png", trigger_counts):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.bar(trigger_counts.keys(), trigger_counts.values())
+        ax.set_title("Workflow Triggers")
+        fig.tight_layout()
+        charts.save(fig, "workflow_triggers.png")
+
+    # -----------------------------
+    # 3️⃣ Auto-Merge
+    # -----------------------------
+    if charts.stale("auto_merge.png", results["auto_merge_enabled"], results["auto_merge_disabled"]):
+        fig, ax = chart_style.new_figure(figsize=(4,4))
+        ax.bar(["Enabled", "Disabled"], [results["auto_merge_enabled"], results["auto_merge_disabled"]])
+        ax.set_title("Auto-Merge Usage")
+        fig.tight_layout()
+        charts.save(fig, "auto_merge.png")
+
+    # -----------------------------
+    # 4️⃣ Deployment Time
+    # -----------------------------
+    deployment_times = results["deployment_times"]
+    if charts.stale("deployment_time.png", deployment_times):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        if deployment_times:
+            ax.hist(deployment_times, bins=15)
+        else:
+            ax.text(0.5, 0.5, "No deployment data", ha="center", va="center")
+        ax.set_xlabel("Minutes")
+        ax.set_title("Deployment Time")
+        fig.tight_layout()
+        charts.save(fig, "deployment_time.png")
+
+    # -----------------------------
+    # 5️⃣ Failed Jobs
+    # -----------------------------
+    if charts.stale("failed_jobs.png", results["failed_jobs"]):
+        fig, ax = chart_style.new_figure(figsize=(4,4))
+        ax.bar(["Failed Jobs"], [results["failed_jobs"]], color="red")
+        ax.set_title("Failed CI Jobs")
+        fig.tight_layout()
+        charts.save(fig, "failed_jobs.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ CI/CD metrics generated successfully")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,198 +3,199 @@ Generate Commit-Level Metrics for GitHub Dashboard
 All outputs are PNG files in metrics/commits/
 """
 
-import os
-import requests
 from pathlib import Path
 from collections import Counter
-import matplotlib
-matplotlib.use("Agg")  # headless mode for GitHub Actions
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
-from textblob import TextBlob
-from datetime import datetime
-
-# -------------------------------
-# Config
-# -------------------------------
-repo_env = os.environ.get("GITHUB_REPOSITORY")
-if not repo_env:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-
-USERNAME = repo_env.split("/")[0]
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN environment variable not set")
-
-HEADERS = {"Authorization": f"token {TOKEN}"}
+import chart_style
+import aggregates
+from ingest import load_store, needed_sources
+from store import TOP_REPOS
+
 OUTPUT_DIR = Path("metrics/commits")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Fetch top 5 repos for performance
-repos = requests.get(f"https://api.github.com/users/{USERNAME}/repos", headers=HEADERS).json()[:5]
-
-# -------------------------------
-# 1️⃣ Commits per Repo + Avg Commit Length
-# -------------------------------
-commit_lengths = []
-commit_counts = {}
-hours = []
-weekdays = []
-
-for repo in repos:
-    name = repo["name"]
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{name}/commits", headers=HEADERS).json()
-    count = len(commits)
-    commit_counts[name] = count
-
-    for c in commits:
-        msg = c["commit"]["message"]
-        commit_lengths.append(len(msg))
-        dt = datetime.fromisoformat(c["commit"]["author"]["date"].replace("Z","+00:00"))
-        hours.append(dt.hour)
-        weekdays.append(dt.weekday())
-
-# Commits per repo (horizontal bar)
-plt.figure(figsize=(8,4))
-if commit_counts:
-    y_pos = range(len(commit_counts))
-    plt.barh(list(commit_counts.keys()), list(commit_counts.values()), color="skyblue")
-    plt.xlabel("Number of Commits")
-    plt.title("Commits per Repo")
-else:
-    plt.text(0.5,0.5,"No commits available", ha="center", va="center", fontsize=14)
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commits_per_repo.png")
-plt.close()
-
-# Average commit length
-avg_length = sum(commit_lengths)/len(commit_lengths) if commit_lengths else 0
-plt.figure(figsize=(4,4))
-plt.bar(["Average Commit Length"], [avg_length], color="orange")
-plt.ylabel("Chars")
-plt.title("Average Commit Length")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "avg_commit_length.png")
-plt.close()
-
-# -------------------------------
-# 2️⃣ Commit Message Sentiment
-# -------------------------------
-sentiments = {"positive":0, "negative":0, "neutral":0}
-
-for msg in [c["commit"]["message"] for repo in repos for c in requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()]:
-    polarity = TextBlob(msg).sentiment.polarity
-    if polarity > 0.1:
-        sentiments["positive"] += 1
-    elif polarity < -0.1:
-        sentiments["negative"] += 1
-    else:
-        sentiments["neutral"] += 1
-
-plt.figure(figsize=(6,4))
-plt.bar(sentiments.keys(), sentiments.values(), color=["green","red","gray"])
-plt.title("Commit Message Sentiment")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commit_sentiment.png")
-plt.close()
-
-# -------------------------------
-# 3️⃣ Commits per Repo Topic
-# -------------------------------
-topic_counter = Counter()
-for repo in repos:
-    topics_url = repo.get("topics_url") or f"https://api.github.com/repos/{USERNAME}/{repo['name']}/topics"
-    topics_resp = requests.get(topics_url, headers={**HEADERS, "Accept":"application/vnd.github.mercy-preview+json"}).json()
-    topics = topics_resp.get("names", [])
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    for t in topics:
-        topic_counter[t] += len(commits)
-
-plt.figure(figsize=(8,4))
-if topic_counter:
-    plt.bar(topic_counter.keys(), topic_counter.values())
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No topics available", ha="center", va="center", fontsize=14)
-plt.title("Commits per Repo Topic")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commits_per_topic.png")
-plt.close()
-
-# -------------------------------
-# 4️⃣ Commits by Branch
-# -------------------------------
-branch_counter = Counter()
-for repo in repos:
-    branches = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/branches", headers=HEADERS).json()
-    for branch in branches:
-        branch_name = branch["name"]
-        commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits?sha={branch_name}", headers=HEADERS).json()
-        branch_counter[branch_name] += len(commits)
-
-plt.figure(figsize=(8,4))
-if branch_counter:
-    plt.bar(branch_counter.keys(), branch_counter.values())
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No branches found", ha="center", va="center", fontsize=14)
-plt.title("Commits by Branch")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commits_by_branch.png")
-plt.close()
-
-# -------------------------------
-# 5️⃣ Most Frequently Edited Files
-# -------------------------------
-file_counter = Counter()
-for repo in repos[:3]:
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    for c in commits:
-        sha = c["sha"]
-        commit_details = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits/{sha}", headers=HEADERS).json()
-        for f in commit_details.get("files", []):
-            file_counter[f["filename"]] += 1
-
-top_files = dict(file_counter.most_common(10))
-plt.figure(figsize=(8,4))
-if top_files:
-    plt.barh(list(top_files.keys()), list(top_files.values()), color="orange")
-else:
-    plt.text(0.5,0.5,"No files found", ha="center", va="center", fontsize=14)
-plt.title("Top 10 Most Frequently Edited Files")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "top_files.png")
-plt.close()
-
-# -------------------------------
-# 6️⃣ Commit Distribution by Weekday
-# -------------------------------
-plt.figure(figsize=(8,4))
-if weekdays:
-    weekday_counts = [weekdays.count(i) for i in range(7)]
-    plt.bar(["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], weekday_counts, color="skyblue")
-else:
-    plt.text(0.5,0.5,"No commit data", ha="center", va="center", fontsize=14)
-plt.title("Commit Distribution by Weekday")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commit_weekday.png")
-plt.close()
-
-# -------------------------------
-# 7️⃣ Commit Distribution by Hour
-# -------------------------------
-plt.figure(figsize=(8,4))
-if hours:
-    hour_counts = [hours.count(i) for i in range(24)]
-    plt.bar(range(24), hour_counts, color="orange")
-    plt.xticks(range(24))
-else:
-    plt.text(0.5,0.5,"No commit data", ha="center", va="center", fontsize=14)
-plt.title("Commit Distribution by Hour")
-plt.xlabel("Hour of Day")
-plt.ylabel("Number of Commits")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "commit_hours.png")
-plt.close()
-
-print("✅ Commit-level metrics generated successfully!")
+
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "commits_per_repo": ("commits",),
+    "avg_commit_length": ("commits",),
+    "commit_sentiment": ("commits",),
+    "commits_per_topic": ("topics", "commits"),
+    "commits_by_branch": ("branches",),
+    "top_files": ("commits",),
+    "commit_weekday": ("commits",),
+    "commit_hours": ("commits",),
+}
+
+
+def collect(store):
+    """Gather every commit-level figure from the local store."""
+    # Top 5 repos for performance
+    repos = store.top_repos(5)
+    listed = f"position IS NOT NULL AND repo IN ({TOP_REPOS})"
+
+    # -------------------------------
+    # 1️⃣ Commits per Repo + Avg Commit Length
+    # -------------------------------
+    commit_counts = {name: 0 for name in repos}
+    for row in store.query(f"SELECT repo, COUNT(*) FROM commits WHERE {listed} GROUP BY repo", 5):
+        commit_counts[row[0]] = row[1]
+
+    avg_length = store.scalar(f"SELECT AVG(LENGTH(message)) FROM commits WHERE {listed}", 5) or 0
+
+    times = aggregates.commit_times(store, 5)
+
+    # -------------------------------
+    # 2️⃣ Commit Message Sentiment
+    # -------------------------------
+    sentiment_totals = aggregates.totals(store, "commit_sentiment", 5)
+    sentiments = {label: sentiment_totals[label] for label in ("positive", "negative", "neutral")}
+
+    # -------------------------------
+    # 3️⃣ Commits per Repo Topic
+    # -------------------------------
+    topic_counter = Counter()
+    for repo, topic in store.query(
+        f"SELECT t.repo, t.topic FROM repo_topics t JOIN repos r ON r.name = t.repo "
+        f"WHERE t.repo IN ({TOP_REPOS}) ORDER BY r.position, t.rowid",
+        5,
+    ):
+        topic_counter[topic] += commit_counts[repo]
+
+    # -------------------------------
+    # 4️⃣ Commits by Branch
+    # -------------------------------
+    branch_counter = Counter()
+    for branch_name, count in store.query(
+        f"SELECT b.name, b.commit_count FROM branches b JOIN repos r ON r.name = b.repo "
+        f"WHERE b.repo IN ({TOP_REPOS}) ORDER BY r.position, b.rowid",
+        5,
+    ):
+        branch_counter[branch_name] += count
+
+    # -------------------------------
+    # 5️⃣ Most Frequently Edited Files
+    # -------------------------------
+    file_counter = aggregates.totals(store, "commit_files", 3)
+
+    return {
+        "commit_counts": commit_counts,
+        "avg_length": avg_length,
+        "sentiments": sentiments,
+        "topic_counter": dict(topic_counter),
+        "branch_counter": dict(branch_counter),
+        "top_files": dict(file_counter.most_common(10)),
+        "hour_counts": [sum(day[hour] for day in times) for hour in range(24)],
+        "weekday_counts": [sum(day) for day in times],
+    }
+
+
+def render(results):
+    """Draw every commit-level chart into ``OUTPUT_DIR``."""
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+    commit_counts = results["commit_counts"]
+    hour_counts = results["hour_counts"]
+    weekday_counts = results["weekday_counts"]
+
+    # Commits per repo (horizontal bar)
+    if charts.stale("commits_per_repo.png", commit_counts):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if commit_counts:
+            ax.barh(list(commit_counts.keys()), list(commit_counts.values()), color="skyblue")
+            ax.set_xlabel("Number of Commits")
+            ax.set_title("Commits per Repo")
+        else:
+            ax.text(0.5,0.5,"No commits available", ha="center", va="center", fontsize=14)
+        fig.tight_layout()
+        charts.save(fig, "commits_per_repo.png")
+
+    # Average commit length
+    if charts.stale("avg_commit_length.png", results["avg_length"]):
+        fig, ax = chart_style.new_figure(figsize=(4,4))
+        ax.bar(["Average Commit Length"], [results["avg_length"]], color="orange")
+        ax.set_ylabel("Chars")
+        ax.set_title("Average Commit Length")
+        fig.tight_layout()
+        charts.save(fig, "avg_commit_length.png")
+
+    # Commit message sentiment
+    sentiments = results["sentiments"]
+    if charts.stale("commit_sentiment.png", sentiments):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.bar(sentiments.keys(), sentiments.values(), color=["green","red","gray"])
+        ax.set_title("Commit Message Sentiment")
+        fig.tight_layout()
+        charts.save(fig, "commit_sentiment.png")
+
+    # Commits per repo topic
+    topic_counter = results["topic_counter"]
+    if charts.stale("commits_per_topic.png", topic_counter):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if topic_counter:
+            ax.bar(topic_counter.keys(), topic_counter.values())
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No topics available", ha="center", va="center", fontsize=14)
+        ax.set_title("Commits per Repo Topic")
+        fig.tight_layout()
+        charts.save(fig, "commits_per_topic.png")
+
+    # Commits by branch
+    branch_counter = results["branch_counter"]
+    if charts.stale("commits_by_branch.png", branch_counter):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if branch_counter:
+            ax.bar(branch_counter.keys(), branch_counter.values())
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No branches found", ha="center", va="center", fontsize=14)
+        ax.set_title("Commits by Branch")
+        fig.tight_layout()
+        charts.save(fig, "commits_by_branch.png")
+
+    # Most frequently edited files
+    top_files = results["top_files"]
+    if charts.stale("top_files.png", top_files):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if top_files:
+            ax.barh(list(top_files.keys()), list(top_files.values()), color="orange")
+        else:
+            ax.text(0.5,0.5,"No files found", ha="center", va="center", fontsize=14)
+        ax.set_title("Top 10 Most Frequently Edited Files")
+        fig.tight_layout()
+        charts.save(fig, "top_files.png")
+
+    # -------------------------------
+    # 6️⃣ Commit Distribution by Weekday
+    # -------------------------------
+    if charts.stale("commit_weekday.png", weekday_counts):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if any(weekday_counts):
+            ax.bar(["Mon","Tue","Wed","Thu","Fri","Sat","Sun"], weekday_counts, color="skyblue")
+        else:
+            ax.text(0.5,0.5,"No commit data", ha="center", va="center", fontsize=14)
+        ax.set_title("Commit Distribution by Weekday")
+        fig.tight_layout()
+        charts.save(fig, "commit_weekday.png")
+
+    # -------------------------------
+    # 7️⃣ Commit Distribution by Hour
+    # -------------------------------
+    if charts.stale("commit_hours.png", hour_counts):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if any(hour_counts):
+            ax.bar(range(24), hour_counts, color="orange")
+            ax.set_xticks(range(24))
+        else:
+            ax.text(0.5,0.5,"No commit data", ha="center", va="center", fontsize=14)
+        ax.set_title("Commit Distribution by Hour")
+        ax.set_xlabel("Hour of Day")
+        ax.set_ylabel("Number of Commits")
+        fig.tight_layout()
+        charts.save(fig, "commit_hours.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ Commit-level metrics generated successfully!")
+
+
+if __name__ == "__main__":
+    main()
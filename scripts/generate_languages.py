@@ -3,171 +3,193 @@ Generate Language / Tech Metrics for GitHub Dashboard
 All outputs are PNG files in metrics/languages/
 """
 
-import os
-import requests
 from pathlib import Path
 from collections import Counter
-import matplotlib
-matplotlib.use("Agg")  # headless mode for GitHub Actions
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
-
-# -------------------------------
-# Configuration
-# -------------------------------
-repo_env = os.environ.get("GITHUB_REPOSITORY")
-if not repo_env:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-
-USERNAME = repo_env.split("/")[0]
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN environment variable not set")
-
-HEADERS = {"Authorization": f"token {TOKEN}"}
+import chart_style
+from ingest import load_store, needed_sources
 
 OUTPUT_DIR = Path("metrics/languages")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# Fetch top 10 repos
-repos = requests.get(f"https://api.github.com/users/{USERNAME}/repos", headers=HEADERS).json()[:10]
-
-# -------------------------------
-# 1️⃣ Languages by LOC
-# -------------------------------
-lang_counter = Counter()
-for repo in repos:
-    langs = requests.get(repo["languages_url"], headers=HEADERS).json()
-    for lang, loc in langs.items():
-        lang_counter[lang] += loc
-
-plt.figure(figsize=(8,4))
-if lang_counter:
-    plt.bar(lang_counter.keys(), lang_counter.values(), color="skyblue")
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No languages found", ha="center", va="center", fontsize=14)
-plt.title("Languages by LOC")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "languages_loc.png")
-plt.close()
-
-# -------------------------------
-# 2️⃣ Languages by Commits
-# -------------------------------
-lang_commit_counter = Counter()
-for repo in repos:
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    langs = requests.get(repo["languages_url"], headers=HEADERS).json()
-    repo_langs = list(langs.keys()) or ["Unknown"]
-    for lang in repo_langs:
-        lang_commit_counter[lang] += len(commits)
-
-plt.figure(figsize=(8,4))
-if lang_commit_counter:
-    plt.bar(lang_commit_counter.keys(), lang_commit_counter.values(), color="orange")
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No commits found", ha="center", va="center", fontsize=14)
-plt.title("Languages by Commits")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "languages_commits.png")
-plt.close()
-
-# -------------------------------
-# 3️⃣ New Languages Over Time
-# -------------------------------
-# Use first commit date per repo to approximate year of language usage
-lang_year_counter = {}
-for repo in repos:
-    commits = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits", headers=HEADERS).json()
-    if not commits:
-        continue
-    first_commit = commits[-1]["commit"]["author"]["date"]  # oldest commit
-    year = int(first_commit[:4])
-    langs = requests.get(repo["languages_url"], headers=HEADERS).json()
-    for lang in langs.keys():
-        if year not in lang_year_counter:
-            lang_year_counter[year] = Counter()
-        lang_year_counter[year][lang] += 1
-
-# Convert to stacked bar
-years = sorted(lang_year_counter.keys())
-all_langs = set(lang for c in lang_year_counter.values() for lang in c)
-bottom = [0]*len(years)
-
-plt.figure(figsize=(10,5))
-for lang in all_langs:
-    counts = [lang_year_counter[y].get(lang, 0) for y in years]
-    plt.bar(years, counts, bottom=bottom, label=lang)
-    bottom = [b + c for b, c in zip(bottom, counts)]
-
-if all_langs:
-    plt.legend(title="Languages")
-plt.xlabel("Year")
-plt.ylabel("New Language Contributions")
-plt.title("New Languages Over Time")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "new_languages.png")
-plt.close()
-
-# -------------------------------
-# 4️⃣ Language vs Repo Size (LOC)
-# -------------------------------
-# Approximate repo size in KB using GitHub API, assign to languages proportionally
-repo_lang_sizes = {}
-for repo in repos:
-    langs = requests.get(repo["languages_url"], headers=HEADERS).json()
-    if not langs:
-        continue
-    repo_size = repo.get("size", 0)  # in KB
-    for lang, loc in langs.items():
-        repo_lang_sizes.setdefault(lang, 0)
-        repo_lang_sizes[lang] += repo_size
-
-plt.figure(figsize=(8,4))
-if repo_lang_sizes:
-    plt.bar(repo_lang_sizes.keys(), repo_lang_sizes.values(), color="purple")
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No data available", ha="center", va="center", fontsize=14)
-plt.title("Language vs Repo Size")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "language_repo.png")
-plt.close()
-
-print("✅ Language metrics generated successfully!")
-
-# -------------------------------
-# 5️⃣ Language Popularity Trend (Cumulative Over Years)
-# -------------------------------
-# Build cumulative sum of language LOC per year
-lang_cumulative = {}
-years = sorted(lang_year_counter.keys())
-all_langs = set(lang for c in lang_year_counter.values() for lang in c)
-
-# Initialize cumulative dictionary
-for lang in all_langs:
-    lang_cumulative[lang] = []
-
-# Compute cumulative sums per language
-for lang in all_langs:
-    cumulative = 0
-    for year in years:
-        cumulative += lang_year_counter.get(year, {}).get(lang, 0)
-        lang_cumulative[lang].append(cumulative)
-
-# Plot cumulative trend
-plt.figure(figsize=(10,5))
-for lang, values in lang_cumulative.items():
-    plt.plot(years, values, marker='o', label=lang)
-
-if all_langs:
-    plt.legend(title="Languages")
-plt.xlabel("Year")
-plt.ylabel("Cumulative Contributions")
-plt.title("Language Popularity Trend Over Time")
-plt.xticks(years)
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "language_trend.png")
-plt.close()
+
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "languages_loc": ("languages",),
+    "languages_commits": ("languages", "commits"),
+    "new_languages": ("languages", "commits"),
+    "language_repo": ("languages",),
+    "language_trend": ("languages", "commits"),
+}
+
+
+def collect(store):
+    """Gather every language figure from the local store."""
+    # Top 10 repos
+    repos = store.query("SELECT name, size FROM repos ORDER BY position LIMIT 10")
+
+    def languages(repo):
+        return {row["language"]: row["bytes"] for row in store.query(
+            "SELECT language, bytes FROM repo_languages WHERE repo = ? ORDER BY rowid", repo["name"]
+        )}
+
+    # -------------------------------
+    # 1️⃣ Languages by LOC
+    # -------------------------------
+    lang_counter = Counter()
+    for repo in repos:
+        for lang, loc in languages(repo).items():
+            lang_counter[lang] += loc
+
+    # -------------------------------
+    # 2️⃣ Languages by Commits
+    # -------------------------------
+    lang_commit_counter = Counter()
+    for repo in repos:
+        commit_count = store.scalar("SELECT COUNT(*) FROM commits WHERE repo = ? AND position IS NOT NULL", repo["name"])
+        repo_langs = list(languages(repo).keys()) or ["Unknown"]
+        for lang in repo_langs:
+            lang_commit_counter[lang] += commit_count
+
+    # -------------------------------
+    # 3️⃣ New Languages Over Time
+    # -------------------------------
+    # Use first commit date per repo to approximate year of language usage
+    lang_year_counter = {}
+    for repo in repos:
+        first_commit = store.scalar(  # oldest commit
+            "SELECT authored_at FROM commits WHERE repo = ? AND position IS NOT NULL ORDER BY position DESC LIMIT 1",
+            repo["name"],
+        )
+        if not first_commit:
+            continue
+        year = int(first_commit[:4])
+        for lang in languages(repo).keys():
+            if year not in lang_year_counter:
+                lang_year_counter[year] = Counter()
+            lang_year_counter[year][lang] += 1
+
+    # -------------------------------
+    # 4️⃣ Language vs Repo Size (LOC)
+    # -------------------------------
+    # Approximate repo size in KB using GitHub API, assign to languages proportionally
+    repo_lang_sizes = {}
+    for repo in repos:
+        langs = languages(repo)
+        if not langs:
+            continue
+        repo_size = repo["size"]  # in KB
+        for lang, loc in langs.items():
+            repo_lang_sizes.setdefault(lang, 0)
+            repo_lang_sizes[lang] += repo_size
+
+    return {
+        "lang_counter": dict(lang_counter),
+        "lang_commit_counter": dict(lang_commit_counter),
+        "lang_year_counter": {year: dict(counter) for year, counter in lang_year_counter.items()},
+        "repo_lang_sizes": repo_lang_sizes,
+    }
+
+
+def render(results):
+    """Draw every language chart into ``OUTPUT_DIR``."""
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+    lang_year_counter = results["lang_year_counter"]
+    years = sorted(lang_year_counter.keys())
+    # Sorted, so legend order and colors don't vary between runs
+    all_langs = sorted(set(lang for c in lang_year_counter.values() for lang in c))
+
+    # Languages by LOC
+    lang_counter = results["lang_counter"]
+    if charts.stale("languages_loc.png", lang_counter):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if lang_counter:
+            ax.bar(lang_counter.keys(), lang_counter.values(), color="skyblue")
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No languages found", ha="center", va="center", fontsize=14)
+        ax.set_title("Languages by LOC")
+        fig.tight_layout()
+        charts.save(fig, "languages_loc.png")
+
+    # Languages by commits
+    lang_commit_counter = results["lang_commit_counter"]
+    if charts.stale("languages_commits.png", lang_commit_counter):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if lang_commit_counter:
+            ax.bar(lang_commit_counter.keys(), lang_commit_counter.values(), color="orange")
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No commits found", ha="center", va="center", fontsize=14)
+        ax.set_title("Languages by Commits")
+        fig.tight_layout()
+        charts.save(fig, "languages_commits.png")
+
+    # New languages over time, as a stacked bar
+    if charts.stale("new_languages.png", lang_year_counter):
+        bottom = [0]*len(years)
+
+        fig, ax = chart_style.new_figure(figsize=(10,5))
+        for lang in all_langs:
+            counts = [lang_year_counter[y].get(lang, 0) for y in years]
+            ax.bar(years, counts, bottom=bottom, label=lang)
+            bottom = [b + c for b, c in zip(bottom, counts)]
+
+        if all_langs:
+            ax.legend(title="Languages")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("New Language Contributions")
+        ax.set_title("New Languages Over Time")
+        fig.tight_layout()
+        charts.save(fig, "new_languages.png")
+
+    # Language vs repo size
+    repo_lang_sizes = results["repo_lang_sizes"]
+    if charts.stale("language_repo.png", repo_lang_sizes):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if repo_lang_sizes:
+            ax.bar(repo_lang_sizes.keys(), repo_lang_sizes.values(), color="purple")
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No data available", ha="center", va="center", fontsize=14)
+        ax.set_title("Language vs Repo Size")
+        fig.tight_layout()
+        charts.save(fig, "language_repo.png")
+
+    # -------------------------------
+    # 5️⃣ Language Popularity Trend (Cumulative Over Years)
+    # -------------------------------
+    if charts.stale("language_trend.png", lang_year_counter):
+        # Build cumulative sum of language LOC per year
+        lang_cumulative = {}
+
+        # Initialize cumulative dictionary
+        for lang in all_langs:
+            lang_cumulative[lang] = []
+
+        # Compute cumulative sums per language
+        for lang in all_langs:
+            cumulative = 0
+            for year in years:
+                cumulative += lang_year_counter.get(year, {}).get(lang, 0)
+                lang_cumulative[lang].append(cumulative)
+
+        # Plot cumulative trend
+        fig, ax = chart_style.new_figure(figsize=(10,5))
+        for lang, values in lang_cumulative.items():
+            ax.plot(years, values, marker='o', label=lang)
+
+        if all_langs:
+            ax.legend(title="Languages")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Cumulative Contributions")
+        ax.set_title("Language Popularity Trend Over Time")
+        ax.set_xticks(years)
+        fig.tight_layout()
+        charts.save(fig, "language_trend.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ Language metrics generated successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,238 +3,238 @@ Generate Pull Request & Issue Metrics for GitHub Dashboard
 All outputs are PNG files in metrics/prs_issues/
 """
 
-import os
-import requests
 from pathlib import Path
-from datetime import datetime
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
-import numpy as np
+from utils.time import epoch_seconds, utc_now
+import chart_style
+import github_api
+import aggregates
+from ingest import load_store, needed_sources
+from store import TOP_REPOS
 from collections import Counter
 
-# -------------------------------
-# Config
-# -------------------------------
-repo_env = os.environ.get("GITHUB_REPOSITORY")
-if not repo_env:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-USERNAME = repo_env.split("/")[0]
-
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN environment variable not set")
-HEADERS = {"Authorization": f"token {TOKEN}"}
-
 OUTPUT_DIR = Path("metrics/prs_issues")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-repos = requests.get(f"https://api.github.com/users/{USERNAME}/repos", headers=HEADERS).json()[:5]
-
-# -------------------------------
-# 1️⃣ PR Merge Time
-# -------------------------------
-pr_merge_times = []
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=closed", headers=HEADERS).json()
-    for pr in pulls:
-        if pr.get("merged_at"):
-            created = datetime.fromisoformat(pr["created_at"].replace("Z","+00:00"))
-            merged = datetime.fromisoformat(pr["merged_at"].replace("Z","+00:00"))
-            delta = (merged - created).total_seconds()/3600
-            pr_merge_times.append(delta)
-
-plt.figure(figsize=(8,4))
-plt.hist(pr_merge_times, bins=20, color="skyblue")
-plt.title("PR Open → Merge Time (hours)")
-plt.xlabel("Hours")
-plt.ylabel("PR Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_merge_time.png")
-plt.close()
-
-# -------------------------------
-# 2️⃣ PR Size (Lines Added + Deleted)
-# -------------------------------
-pr_sizes = []
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=closed", headers=HEADERS).json()
-    for pr in pulls:
-        if pr.get("merged_at"):
-            sha = pr["merge_commit_sha"]
-            if sha:
-                commit = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/commits/{sha}", headers=HEADERS).json()
-                stats = commit.get("stats", {})
-                pr_sizes.append(stats.get("additions",0) + stats.get("deletions",0))
-
-plt.figure(figsize=(8,4))
-plt.hist(pr_sizes, bins=20, color="orange")
-plt.title("PR Size (Lines Changed)")
-plt.xlabel("Lines Changed")
-plt.ylabel("PR Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_size.png")
-plt.close()
-
-# -------------------------------
-# 3️⃣ PR Comments Received/Given
-# -------------------------------
-pr_comments = []
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in pulls:
-        pr_comments.append(pr.get("comments",0) + pr.get("review_comments",0))
-
-plt.figure(figsize=(8,4))
-plt.hist(pr_comments, bins=20, color="green")
-plt.title("PR Comments Received/Given")
-plt.xlabel("Number of Comments")
-plt.ylabel("PR Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_comments.png")
-plt.close()
-
-# -------------------------------
-# 4️⃣ PR Approval Rate
-# -------------------------------
-approvals = 0
-total_reviews = 0
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in pulls:
-        reviews = requests.get(pr["url"] + "/reviews", headers=HEADERS).json()
-        for review in reviews:
-            if review["user"]["login"].lower() == USERNAME.lower():
-                total_reviews += 1
-                if review["state"].lower() == "approved":
-                    approvals += 1
-
-approval_rate = (approvals / total_reviews*100) if total_reviews else 0
-plt.figure(figsize=(4,4))
-plt.bar(["Approval Rate"], [approval_rate], color="purple")
-plt.ylim(0,100)
-plt.ylabel("% Approved")
-plt.title("PR Approval Rate")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_approval_rate.png")
-plt.close()
-
-# -------------------------------
-# 5️⃣ Issue Age Distribution
-# -------------------------------
-issue_ages = []
-for repo in repos:
-    issues = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/issues?state=all", headers=HEADERS).json()
-    for issue in issues:
-        if "pull_request" not in issue:
-            created = datetime.fromisoformat(issue["created_at"].replace("Z","+00:00"))
-            closed = datetime.fromisoformat(issue["closed_at"].replace("Z","+00:00")) if issue.get("closed_at") else datetime.utcnow()
-            delta = (closed - created).days
-            issue_ages.append(delta)
-
-plt.figure(figsize=(8,4))
-plt.hist(issue_ages, bins=20, color="red")
-plt.title("Issue Age Distribution (days)")
-plt.xlabel("Days")
-plt.ylabel("Issue Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "issue_age.png")
-plt.close()
-
-# -------------------------------
-# 6️⃣ Closed vs Open Issues by Repo
-# -------------------------------
-closed_open = {}
-for repo in repos:
-    issues = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/issues?state=all", headers=HEADERS).json()
-    closed_open[repo["name"]] = {"open":0,"closed":0}
-    for issue in issues:
-        if "pull_request" not in issue:
-            if issue.get("state") == "open":
-                closed_open[repo["name"]]["open"] += 1
-            else:
-                closed_open[repo["name"]]["closed"] += 1
-
-plt.figure(figsize=(10,4))
-repos_list = list(closed_open.keys())
-open_counts = [closed_open[r]["open"] for r in repos_list]
-closed_counts = [closed_open[r]["closed"] for r in repos_list]
-plt.bar(repos_list, open_counts, label="Open", color="orange")
-plt.bar(repos_list, closed_counts, bottom=open_counts, label="Closed", color="green")
-plt.xticks(rotation=45)
-plt.ylabel("Issue Count")
-plt.title("Closed vs Open Issues by Repo")
-plt.legend()
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "closed_vs_open.png")
-plt.close()
-
-# -------------------------------
-# 7️⃣ Top Issue & PR Labels
-# -------------------------------
-label_counter = Counter()
-for repo in repos:
-    # Issues
-    issues = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/issues?state=all", headers=HEADERS).json()
-    for i in issues:
-        if "pull_request" not in i:
-            for label in i.get("labels", []):
-                label_counter[label["name"]] += 1
-    # PRs
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in pulls:
-        for label in pr.get("labels", []):
-            label_counter[label["name"]] += 1
-
-top_labels = dict(label_counter.most_common(10))
-plt.figure(figsize=(8,4))
-plt.bar(top_labels.keys(), top_labels.values(), color="skyblue")
-plt.xticks(rotation=45)
-plt.title("Top Issue Labels Used")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "top_labels.png")
-plt.close()
-
-# -------------------------------
-# 8️⃣ PR Review Latency (Time to First Review)
-# -------------------------------
-review_latencies = []
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in pulls:
-        reviews = requests.get(pr["url"] + "/reviews", headers=HEADERS).json()
-        if reviews:
-            first_review = min(datetime.fromisoformat(r["submitted_at"].replace("Z","+00:00")) for r in reviews)
-            created = datetime.fromisoformat(pr["created_at"].replace("Z","+00:00"))
-            latency = (first_review - created).total_seconds()/3600
-            review_latencies.append(latency)
-
-plt.figure(figsize=(8,4))
-plt.hist(review_latencies, bins=20, color="purple")
-plt.title("PR Review Latency (hours)")
-plt.xlabel("Hours")
-plt.ylabel("PR Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_review_latency.png")
-plt.close()
-
-# -------------------------------
-# 9️⃣ PR Merge Method Distribution
-# -------------------------------
-merge_methods = Counter()
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=all", headers=HEADERS).json()
-    for pr in pulls:
-        method = pr.get("mergeable_state","unknown")
-        merge_methods[method] += 1
 
-plt.figure(figsize=(8,4))
-plt.bar(merge_methods.keys(), merge_methods.values(), color="orange")
-plt.title("PR Merge Method Distribution")
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pr_merge_method.png")
-plt.close()
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "pr_merge_time": ("pulls",),
+    "pr_size": ("pulls", "merge_commits"),
+    "pr_comments": ("pulls",),
+    "pr_approval_rate": ("profile", "pulls", "reviews"),
+    "issue_age": ("issues",),
+    "closed_vs_open": ("issues",),
+    "top_labels": ("issues", "pulls"),
+    "pr_review_latency": ("pulls", "reviews"),
+    "pr_merge_method": ("pulls",),
+}
+
+
+def collect(store):
+    """Gather every pull request and issue figure from the local store."""
+    repos = store.top_repos(5)
+    username = str(store.profile("login", "")).lower()
+    in_repos = f"repo IN ({TOP_REPOS})"
+
+    # -------------------------------
+    # 1️⃣ PR Merge Time
+    # -------------------------------
+    pr_merge_times = store.column(
+        f"SELECT ({epoch_seconds('merged_at')} - {epoch_seconds('created_at')}) / 3600.0 "
+        f"FROM pulls WHERE {in_repos} AND state = 'closed' AND merged_at IS NOT NULL",
+        5,
+    )
+
+    # -------------------------------
+    # 2️⃣ PR Size (Lines Added + Deleted)
+    # -------------------------------
+    # Merge commits of the most recent closed PRs per repo
+    pr_sizes = store.column(
+        f"SELECT COALESCE(c.additions, 0) + COALESCE(c.deletions, 0) FROM "
+        f"(SELECT repo, merge_commit_sha, merged_at, ROW_NUMBER() OVER (PARTITION BY repo ORDER BY position) AS rank "
+        f" FROM pulls WHERE {in_repos} AND state = 'closed') p "
+        f"JOIN commits c ON c.repo = p.repo AND c.sha = p.merge_commit_sha "
+        f"WHERE p.rank <= ? AND p.merged_at IS NOT NULL",
+        5, github_api.DETAIL_LIMIT,
+    )
+
+    # -------------------------------
+    # 3️⃣ PR Comments Received/Given
+    # -------------------------------
+    pr_comments = store.column(f"SELECT comments + review_comments FROM pulls WHERE {in_repos}", 5)
+
+    # -------------------------------
+    # 4️⃣ PR Approval Rate
+    # -------------------------------
+    recent = f"p.{in_repos} AND p.position < ?"
+    approvals = 0
+    total_reviews = 0
+    for state in store.column(
+        f"SELECT r.state FROM reviews r JOIN pulls p ON p.repo = r.repo AND p.number = r.pull_number "
+        f"WHERE {recent} AND LOWER(r.reviewer) = ?",
+        5, github_api.DETAIL_LIMIT, username,
+    ):
+        total_reviews += 1
+        if state.lower() == "approved":
+            approvals += 1
+
+    approval_rate = (approvals / total_reviews*100) if total_reviews else 0
+
+    # -------------------------------
+    # 5️⃣ Issue Age Distribution
+    # -------------------------------
+    # Open issues are aged until now; whole days, rounded down
+    issue_ages = store.column(
+        f"SELECT (COALESCE({epoch_seconds('closed_at')}, ?) - {epoch_seconds('created_at')}) / 86400 "
+        f"FROM issues WHERE {in_repos} AND NOT is_pull_request",
+        int(utc_now().timestamp()), 5,
+    )
+
+    # -------------------------------
+    # 6️⃣ Closed vs Open Issues by Repo
+    # -------------------------------
+    closed_open = {name: {"open":0,"closed":0} for name in repos}
+    for row in store.query(f"SELECT repo, state = 'open', COUNT(*) FROM issues WHERE {in_repos} AND NOT is_pull_request GROUP BY 1, 2", 5):
+        closed_open[row[0]]["open" if row[1] else "closed"] = row[2]
+
+    # -------------------------------
+    # 7️⃣ Top Issue & PR Labels
+    # -------------------------------
+    label_counter = aggregates.labels(store, 5)
+
+    # -------------------------------
+    # 8️⃣ PR Review Latency (Time to First Review)
+    # -------------------------------
+    review_latencies = store.column(
+        f"SELECT ({epoch_seconds('MIN(r.submitted_at)')} - {epoch_seconds('p.created_at')}) / 3600.0 FROM pulls p "
+        f"JOIN reviews r ON r.repo = p.repo AND r.pull_number = p.number "
+        f"WHERE {recent} AND r.submitted_at IS NOT NULL GROUP BY p.repo, p.number",
+        5, github_api.DETAIL_LIMIT,
+    )
+
+    # -------------------------------
+    # 9️⃣ PR Merge Method Distribution
+    # -------------------------------
+    merge_methods = Counter()
+    for (method,) in store.query(f"SELECT COALESCE(mergeable_state, 'unknown') FROM pulls WHERE {in_repos}", 5):
+        merge_methods[method] += 1
 
-print("✅ PR & Issue metrics generated successfully!")
+    return {
+        "pr_merge_times": pr_merge_times,
+        "pr_sizes": pr_sizes,
+        "pr_comments": pr_comments,
+        "approval_rate": approval_rate,
+        "issue_ages": issue_ages,
+        "closed_open": closed_open,
+        "top_labels": dict(label_counter.most_common(10)),
+        "review_latencies": review_latencies,
+        "merge_methods": dict(merge_methods),
+    }
+
+
+def render(results):
+    """Draw every pull request and issue chart into ``OUTPUT_DIR``."""
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+
+    # PR merge time
+    if charts.stale("pr_merge_time.png", results["pr_merge_times"]):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.hist(results["pr_merge_times"], bins=20, color="skyblue")
+        ax.set_title("PR Open → Merge Time (hours)")
+        ax.set_xlabel("Hours")
+        ax.set_ylabel("PR Count")
+        fig.tight_layout()
+        charts.save(fig, "pr_merge_time.png")
+
+    # PR size
+    if charts.stale("pr_size.png", results["pr_sizes"]):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.hist(results["pr_sizes"], bins=20, color="orange")
+        ax.set_title("PR Size (Lines Changed)")
+        ax.set_xlabel("Lines Changed")
+        ax.set_ylabel("PR Count")
+        fig.tight_layout()
+        charts.save(fig, "pr_size.png")
+
+    # PR comments
+    if charts.stale("pr_comments.png", results["pr_comments"]):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.hist(results["pr_comments"], bins=20, color="green")
+        ax.set_title("PR Comments Received/Given")
+        ax.set_xlabel("Number of Comments")
+        ax.set_ylabel("PR Count")
+        fig.tight_layout()
+        charts.save(fig, "pr_comments.png")
+
+    # PR approval rate
+    if charts.stale("pr_approval_rate.png", results["approval_rate"]):
+        fig, ax = chart_style.new_figure(figsize=(4,4))
+        ax.bar(["Approval Rate"], [results["approval_rate"]], color="purple")
+        ax.set_ylim(0,100)
+        ax.set_ylabel("% Approved")
+        ax.set_title("PR Approval Rate")
+        fig.tight_layout()
+        charts.save(fig, "pr_approval_rate.png")
+
+    # Issue age
+    if charts.stale("issue_age.png", results["issue_ages"]):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.hist(results["issue_ages"], bins=20, color="red")
+        ax.set_title("Issue Age Distribution (days)")
+        ax.set_xlabel("Days")
+        ax.set_ylabel("Issue Count")
+        fig.tight_layout()
+        charts.save(fig, "issue_age.png")
+
+    # Closed vs open issues
+    closed_open = results["closed_open"]
+    if charts.stale("closed_vs_open.png", closed_open):
+        fig, ax = chart_style.new_figure(figsize=(10,4))
+        repos_list = list(closed_open.keys())
+        open_counts = [closed_open[r]["open"] for r in repos_list]
+        closed_counts = [closed_open[r]["closed"] for r in repos_list]
+        ax.bar(repos_list, open_counts, label="Open", color="orange")
+        ax.bar(repos_list, closed_counts, bottom=open_counts, label="Closed", color="green")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_ylabel("Issue Count")
+        ax.set_title("Closed vs Open Issues by Repo")
+        ax.legend()
+        fig.tight_layout()
+        charts.save(fig, "closed_vs_open.png")
+
+    # Top labels
+    top_labels = results["top_labels"]
+    if charts.stale("top_labels.png", top_labels):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(top_labels.keys(), top_labels.values(), color="skyblue")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.set_title("Top Issue Labels Used")
+        fig.tight_layout()
+        charts.save(fig, "top_labels.png")
+
+    # PR review latency
+    if charts.stale("pr_review_latency.png", results["review_latencies"]):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.hist(results["review_latencies"], bins=20, color="purple")
+        ax.set_title("PR Review Latency (hours)")
+        ax.set_xlabel("Hours")
+        ax.set_ylabel("PR Count")
+        fig.tight_layout()
+        charts.save(fig, "pr_review_latency.png")
+
+    # PR merge method
+    merge_methods = results["merge_methods"]
+    if charts.stale("pr_merge_method.png", merge_methods):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.bar(merge_methods.keys(), merge_methods.values(), color="orange")
+        ax.set_title("PR Merge Method Distribution")
+        ax.tick_params(axis="x", labelrotation=45)
+        fig.tight_layout()
+        charts.save(fig, "pr_merge_method.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ PR & Issue metrics generated successfully!")
+
+
+if __name__ == "__main__":
+    main()
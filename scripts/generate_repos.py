@@ -1,139 +1,156 @@
-import os
-import requests
 from pathlib import Path
 from collections import Counter
 from datetime import datetime, timezone
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
+import chart_style
+from ingest import load_store, needed_sources
 
-# -----------------------------
-# Auth / Setup
-# -----------------------------
-repo = os.environ.get("GITHUB_REPOSITORY")
-if not repo:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-
-USERNAME = repo.split("/")[0]
+OUTPUT_DIR = Path("metrics/repos")
 
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN not set")
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "repo_activity": ("repos",),
+    "repo_growth": ("repos",),
+    "repo_sizes": ("repos",),
+    "language_complexity": ("languages",),
+    "stars_forks": ("repos",),
+    "contributed_to": ("repos",),
+    "pinned_repos": ("repos",),
+}
 
-HEADERS = {"Authorization": f"token {TOKEN}"}
 
-OUTPUT_DIR = Path("metrics/repos")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-repos = requests.get(
-    f"https://api.github.com/users/{USERNAME}/repos?per_page=100",
-    headers=HEADERS
-).json()
-
-# -----------------------------
-# 1️⃣ Repo Activity (last push)
-# -----------------------------
-recent_repos = sorted(repos, key=lambda r: r["pushed_at"], reverse=True)[:12]
-activity = {
-    r["name"]: max(
-        0,
-        (datetime.now(timezone.utc) - datetime.fromisoformat(r["pushed_at"].replace("Z", "+00:00"))).days,
+def collect(store):
+    repos = store.query(
+        "SELECT r.*, (SELECT COUNT(*) FROM repo_languages l WHERE l.repo = r.name) AS language_count "
+        "FROM repos r ORDER BY position"
     )
-    for r in reversed(recent_repos)
-}
 
-plt.figure(figsize=(9,5))
-plt.barh(activity.keys(), activity.values())
-plt.xlabel("Days since last push · lower is better")
-plt.title("Most Recently Active Repositories")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "repo_activity.png")
-plt.close()
-
-# -----------------------------
-# 2️⃣ Repo Growth (creation year)
-# -----------------------------
-years = Counter(r["created_at"][:4] for r in repos)
-
-plt.figure(figsize=(6,4))
-plt.plot(sorted(years.keys()), [years[y] for y in sorted(years.keys())], marker="o")
-plt.title("Repo Growth")
-plt.xlabel("Year")
-plt.ylabel("Repos Created")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "repo_growth.png")
-plt.close()
-
-# -----------------------------
-# 3️⃣ Repo Sizes
-# -----------------------------
-largest = sorted(repos, key=lambda r: r["size"], reverse=True)[:12]
-sizes = {r["name"]: r["size"] for r in reversed(largest)}
-
-plt.figure(figsize=(9,5))
-plt.barh(sizes.keys(), sizes.values())
-plt.xlabel("Repository size (KB)")
-plt.title("Largest Repositories")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "repo_sizes.png")
-plt.close()
-
-# -----------------------------
-# 4️⃣ Language Complexity
-# -----------------------------
-language_complexity = {}
-
-for r in repos:
-    langs = requests.get(r["languages_url"], headers=HEADERS).json()
-    language_complexity[r["name"]] = len(langs)
-
-complex_repos = sorted(language_complexity.items(), key=lambda item: item[1], reverse=True)[:12]
-complex_repos = dict(reversed(complex_repos))
-plt.figure(figsize=(9,5))
-plt.barh(complex_repos.keys(), complex_repos.values())
-plt.xlabel("Languages detected")
-plt.title("Most Polyglot Repositories")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "language_complexity.png")
-plt.close()
-
-# -----------------------------
-# 5️⃣ Stars vs Forks
-# -----------------------------
-stars = sum(r["stargazers_count"] for r in repos)
-forks = sum(r["forks_count"] for r in repos)
-
-plt.figure(figsize=(5,4))
-plt.bar(["Stars", "Forks"], [stars, forks])
-plt.title("Stars vs Forks")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "stars_forks.png")
-plt.close()
-
-# -----------------------------
-# 6️⃣ Contributed To (forked repos)
-# -----------------------------
-forked = sum(1 for r in repos if r["fork"])
-
-plt.figure(figsize=(4,4))
-plt.bar(["Forked", "Owned"], [forked, len(repos) - forked])
-plt.title("Contributed To Repos")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "contributed_to.png")
-plt.close()
-
-# -----------------------------
-# 7️⃣ Pinned Repos (top starred)
-# -----------------------------
-top = sorted(repos, key=lambda r: r["stargazers_count"], reverse=True)[:6]
-
-plt.figure(figsize=(8,4))
-plt.barh([r["name"] for r in reversed(top)], [r["stargazers_count"] for r in reversed(top)])
-plt.xlabel("Stars")
-plt.title("Most Starred Repositories")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "pinned_repos.png")
-plt.close()
-
-print("✅ Repo metrics generated successfully")
+    # -----------------------------
+    # 1️⃣ Repo Activity (last push)
+    # -----------------------------
+    recent_repos = sorted(repos, key=lambda r: r["pushed_at"], reverse=True)[:12]
+    activity = {
+        r["name"]: max(
+            0,
+            (datetime.now(timezone.utc) - datetime.fromisoformat(r["pushed_at"].replace("Z", "+00:00"))).days,
+        )
+        for r in reversed(recent_repos)
+    }
+
+    # -----------------------------
+    # 2️⃣ Repo Growth (creation year)
+    # -----------------------------
+    years = Counter(r["created_at"][:4] for r in repos)
+
+    # -----------------------------
+    # 3️⃣ Repo Sizes
+    # -----------------------------
+    largest = sorted(repos, key=lambda r: r["size"], reverse=True)[:12]
+    sizes = {r["name"]: r["size"] for r in reversed(largest)}
+
+    # -----------------------------
+    # 4️⃣ Language Complexity
+    # -----------------------------
+    language_complexity = {r["name"]: r["language_count"] for r in repos}
+
+    complex_repos = sorted(language_complexity.items(), key=lambda item: item[1], reverse=True)[:12]
+
+    # -----------------------------
+    # 5️⃣ Stars vs Forks
+    # -----------------------------
+    stars = sum(r["stargazers_count"] for r in repos)
+    forks = sum(r["forks_count"] for r in repos)
+
+    # -----------------------------
+    # 6️⃣ Contributed To (forked repos)
+    # -----------------------------
+    forked = sum(1 for r in repos if r["fork"])
+
+    # -----------------------------
+    # 7️⃣ Pinned Repos (top starred)
+    # -----------------------------
+    top = sorted(repos, key=lambda r: r["stargazers_count"], reverse=True)[:6]
+
+    return {
+        "activity": activity,
+        "years": dict(years),
+        "sizes": sizes,
+        "complex_repos": dict(reversed(complex_repos)),
+        "stars": stars,
+        "forks": forks,
+        "forked": forked,
+        "owned": len(repos) - forked,
+        "pinned": {r["name"]: r["stargazers_count"] for r in reversed(top)},
+    }
+
+
+def render(results):
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+
+    activity = results["activity"]
+    if charts.stale("repo_activity.png", activity):
+        fig, ax = chart_style.new_figure(figsize=(9,5))
+        ax.barh(activity.keys(), activity.values())
+        ax.set_xlabel("Days since last push · lower is better")
+        ax.set_title("Most Recently Active Repositories")
+        fig.tight_layout()
+        charts.save(fig, "repo_activity.png")
+
+    years = results["years"]
+    if charts.stale("repo_growth.png", years):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.plot(sorted(years.keys()), [years[y] for y in sorted(years.keys())], marker="o")
+        ax.set_title("Repo Growth")
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Repos Created")
+        fig.tight_layout()
+        charts.save(fig, "repo_growth.png")
+
+    sizes = results["sizes"]
+    if charts.stale("repo_sizes.png", sizes):
+        fig, ax = chart_style.new_figure(figsize=(9,5))
+        ax.barh(sizes.keys(), sizes.values())
+        ax.set_xlabel("Repository size (KB)")
+        ax.set_title("Largest Repositories")
+        fig.tight_layout()
+        charts.save(fig, "repo_sizes.png")
+
+    complex_repos = results["complex_repos"]
+    if charts.stale("language_complexity.png", complex_repos):
+        fig, ax = chart_style.new_figure(figsize=(9,5))
+        ax.barh(complex_repos.keys(), complex_repos.values())
+        ax.set_xlabel("Languages detected")
+        ax.set_title("Most Polyglot Repositories")
+        fig.tight_layout()
+        charts.save(fig, "language_complexity.png")
+
+    if charts.stale("stars_forks.png", results["stars"], results["forks"]):
+        fig, ax = chart_style.new_figure(figsize=(5,4))
+        ax.bar(["Stars", "Forks"], [results["stars"], results["forks"]])
+        ax.set_title("Stars vs Forks")
+        fig.tight_layout()
+        charts.save(fig, "stars_forks.png")
+
+    if charts.stale("contributed_to.png", results["forked"], results["owned"]):
+        fig, ax = chart_style.new_figure(figsize=(4,4))
+        ax.bar(["Forked", "Owned"], [results["forked"], results["owned"]])
+        ax.set_title("Contributed To Repos")
+        fig.tight_layout()
+        charts.save(fig, "contributed_to.png")
+
+    pinned = results["pinned"]
+    if charts.stale("pinned_repos.png", pinned):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        ax.barh(list(pinned.keys()), list(pinned.values()))
+        ax.set_xlabel("Stars")
+        ax.set_title("Most Starred Repositories")
+        fig.tight_layout()
+        charts.save(fig, "pinned_repos.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ Repo metrics generated successfully")
+
+
+if __name__ == "__main__":
+    main()
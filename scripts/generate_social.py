@@ -3,145 +3,156 @@ Generate Social Metrics for GitHub Dashboard
 All outputs are PNG files in metrics/social/
 """
 
-import os
-import requests
 from pathlib import Path
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import chart_style  # noqa: F401 - applies the shared dashboard theme
+import chart_style
+from ingest import load_store, needed_sources
+from store import TOP_REPOS
 from collections import Counter
 
-# -----------------------------
-# Configuration
-# -----------------------------
-repo_env = os.environ.get("GITHUB_REPOSITORY")
-if not repo_env:
-    raise RuntimeError("GITHUB_REPOSITORY environment variable not set")
-USERNAME = repo_env.split("/")[0]
-
-TOKEN = os.environ.get("GH_TOKEN")
-if not TOKEN:
-    raise RuntimeError("GH_TOKEN environment variable not set")
-
-HEADERS = {
-    "Authorization": f"token {TOKEN}",
-    "Accept": "application/vnd.github+json"
+OUTPUT_DIR = Path("metrics/social")
+
+# Chart (PNG name) -> the ingest.SOURCES its data comes from
+CHARTS = {
+    "followers_growth": ("profile",),
+    "top_collaborators": ("profile", "pulls"),
+    "mentions": ("issues",),
+    "orgs": ("profile",),
+    "stars_karma": ("profile",),
+    "starred_repos": ("repos",),
 }
 
-OUTPUT_DIR = Path("metrics/social")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-# -----------------------------
-# 1️⃣ Follower / Following Growth
-# -----------------------------
-user = requests.get(f"https://api.github.com/users/{USERNAME}", headers=HEADERS).json()
-followers = user.get("followers", 0)
-following = user.get("following", 0)
-
-plt.figure(figsize=(6,4))
-plt.bar(["Followers", "Following"], [followers, following], color=["blue","green"])
-plt.title("Follower / Following Growth")
-plt.ylabel("Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "followers_growth.png")
-plt.close()
-
-# -----------------------------
-# 2️⃣ Top Collaborators (PRs and commits)
-# -----------------------------
-collaborators_counter = Counter()
-repos = requests.get(f"https://api.github.com/users/{USERNAME}/repos", headers=HEADERS).json()[:5]
-
-for repo in repos:
-    pulls = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/pulls?state=closed", headers=HEADERS).json()
-    for pr in pulls:
-        user_login = pr.get("user", {}).get("login")
-        if user_login and user_login != USERNAME:
+
+def collect(store):
+    """Gather every social figure from the local store."""
+    # -----------------------------
+    # 1️⃣ Follower / Following Growth
+    # -----------------------------
+    username = store.profile("login", "")
+
+    # -----------------------------
+    # 2️⃣ Top Collaborators (PRs and commits)
+    # -----------------------------
+    collaborators_counter = Counter()
+    repos = store.query("SELECT name, stargazers_count FROM repos ORDER BY position LIMIT 5")
+
+    for user_login in store.column(
+        f"SELECT author FROM pulls WHERE repo IN ({TOP_REPOS}) AND state = 'closed' ORDER BY repo, position", 5
+    ):
+        if user_login and user_login != username:
             collaborators_counter[user_login] += 1
 
-top_collaborators = dict(collaborators_counter.most_common(10))
-plt.figure(figsize=(8,4))
-if top_collaborators:
-    plt.barh(list(top_collaborators.keys()), list(top_collaborators.values()), color="orange")
-else:
-    plt.text(0.5,0.5,"No collaborators", ha="center", va="center", fontsize=14)
-plt.title("Top Collaborators")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "top_collaborators.png")
-plt.close()
-
-# -----------------------------
-# 3️⃣ Mentions in Issues / PRs
-# -----------------------------
-mentions_counter = Counter()
-for repo in repos:
-    issues = requests.get(f"https://api.github.com/repos/{USERNAME}/{repo['name']}/issues?state=all", headers=HEADERS).json()
-    for issue in issues:
-        if "@" in issue.get("body",""):
-            mentions_counter[repo['name']] += 1
-
-plt.figure(figsize=(8,4))
-if mentions_counter:
-    plt.bar(mentions_counter.keys(), mentions_counter.values(), color="purple")
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No mentions found", ha="center", va="center", fontsize=14)
-plt.title("Mentions in Issues / PRs")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "mentions.png")
-plt.close()
-
-# -----------------------------
-# 4️⃣ Organizations Contributed To
-# -----------------------------
-orgs = requests.get(f"https://api.github.com/users/{USERNAME}/orgs", headers=HEADERS).json()
-org_names = [o.get("login") for o in orgs]
-
-plt.figure(figsize=(8,4))
-if org_names:
-    plt.bar(org_names, [1]*len(org_names), color="cyan")
-    plt.xticks(rotation=45)
-else:
-    plt.text(0.5,0.5,"No orgs found", ha="center", va="center", fontsize=14)
-plt.title("Organizations Contributed To")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "orgs.png")
-plt.close()
-
-# -----------------------------
-# 5️⃣ Stars Given vs Stars Received
-# -----------------------------
-# Stars given: sum of all stars in repos where USERNAME contributed (simplified)
-stars_given = 0
-repos_starred = requests.get(f"https://api.github.com/users/{USERNAME}/starred", headers=HEADERS).json()
-stars_given = len(repos_starred)
-
-# Stars received: sum of stars in user's repos
-stars_received = sum(r.get("stargazers_count",0) for r in repos)
-
-plt.figure(figsize=(6,4))
-plt.bar(["Stars Given","Stars Received"], [stars_given, stars_received], color=["red","green"])
-plt.title("Stars Given vs Stars Received")
-plt.ylabel("Count")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "stars_karma.png")
-plt.close()
-
-# -----------------------------
-# 6️⃣ Most Starred Repos Contributed To
-# -----------------------------
-repo_star_counts = {r["name"]: r.get("stargazers_count",0) for r in repos}
-top_starred = dict(sorted(repo_star_counts.items(), key=lambda x: x[1], reverse=True)[:10])
-
-plt.figure(figsize=(8,4))
-if top_starred:
-    plt.barh(list(top_starred.keys()), list(top_starred.values()), color="gold")
-else:
-    plt.text(0.5,0.5,"No starred repos", ha="center", va="center", fontsize=14)
-plt.title("Most Starred Repos You Contributed To")
-plt.tight_layout()
-plt.savefig(OUTPUT_DIR / "starred_repos.png")
-plt.close()
-
-print("✅ Social metrics generated successfully!")
+    # -----------------------------
+    # 3️⃣ Mentions in Issues / PRs
+    # -----------------------------
+    mentions_counter = Counter()
+    for row in store.query(
+        f"SELECT repo, COUNT(*) FROM issues WHERE repo IN ({TOP_REPOS}) AND body LIKE '%@%' GROUP BY repo", 5
+    ):
+        mentions_counter[row[0]] = row[1]
+
+    # -----------------------------
+    # 4️⃣ Organizations Contributed To
+    # -----------------------------
+    org_names = store.column("SELECT login FROM orgs ORDER BY rowid")
+
+    # -----------------------------
+    # 5️⃣ Stars Given vs Stars Received
+    # -----------------------------
+    # Stars given: sum of all stars in repos where USERNAME contributed (simplified)
+    stars_given = store.scalar("SELECT COUNT(*) FROM starred")
+
+    # Stars received: sum of stars in user's repos
+    stars_received = sum(r["stargazers_count"] for r in repos)
+
+    # -----------------------------
+    # 6️⃣ Most Starred Repos Contributed To
+    # -----------------------------
+    repo_star_counts = {r["name"]: r["stargazers_count"] for r in repos}
+    top_starred = dict(sorted(repo_star_counts.items(), key=lambda x: x[1], reverse=True)[:10])
+
+    return {
+        "followers": store.profile("followers"),
+        "following": store.profile("following"),
+        "top_collaborators": dict(collaborators_counter.most_common(10)),
+        "mentions": dict(mentions_counter),
+        "org_names": org_names,
+        "stars_given": stars_given,
+        "stars_received": stars_received,
+        "top_starred": top_starred,
+    }
+
+
+def render(results):
+    """Draw every social chart into ``OUTPUT_DIR``."""
+    charts = chart_style.Manifest(OUTPUT_DIR, __file__)
+
+    if charts.stale("followers_growth.png", results["followers"], results["following"]):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.bar(["Followers", "Following"], [results["followers"], results["following"]], color=["blue","green"])
+        ax.set_title("Follower / Following Growth")
+        ax.set_ylabel("Count")
+        fig.tight_layout()
+        charts.save(fig, "followers_growth.png")
+
+    top_collaborators = results["top_collaborators"]
+    if charts.stale("top_collaborators.png", top_collaborators):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if top_collaborators:
+            ax.barh(list(top_collaborators.keys()), list(top_collaborators.values()), color="orange")
+        else:
+            ax.text(0.5,0.5,"No collaborators", ha="center", va="center", fontsize=14)
+        ax.set_title("Top Collaborators")
+        fig.tight_layout()
+        charts.save(fig, "top_collaborators.png")
+
+    mentions_counter = results["mentions"]
+    if charts.stale("mentions.png", mentions_counter):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if mentions_counter:
+            ax.bar(mentions_counter.keys(), mentions_counter.values(), color="purple")
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No mentions found", ha="center", va="center", fontsize=14)
+        ax.set_title("Mentions in Issues / PRs")
+        fig.tight_layout()
+        charts.save(fig, "mentions.png")
+
+    org_names = results["org_names"]
+    if charts.stale("orgs.png", org_names):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if org_names:
+            ax.bar(org_names, [1]*len(org_names), color="cyan")
+            ax.tick_params(axis="x", labelrotation=45)
+        else:
+            ax.text(0.5,0.5,"No orgs found", ha="center", va="center", fontsize=14)
+        ax.set_title("Organizations Contributed To")
+        fig.tight_layout()
+        charts.save(fig, "orgs.png")
+
+    if charts.stale("stars_karma.png", results["stars_given"], results["stars_received"]):
+        fig, ax = chart_style.new_figure(figsize=(6,4))
+        ax.bar(["Stars Given","Stars Received"], [results["stars_given"], results["stars_received"]], color=["red","green"])
+        ax.set_title("Stars Given vs Stars Received")
+        ax.set_ylabel("Count")
+        fig.tight_layout()
+        charts.save(fig, "stars_karma.png")
+
+    top_starred = results["top_starred"]
+    if charts.stale("starred_repos.png", top_starred):
+        fig, ax = chart_style.new_figure(figsize=(8,4))
+        if top_starred:
+            ax.barh(list(top_starred.keys()), list(top_starred.values()), color="gold")
+        else:
+            ax.text(0.5,0.5,"No starred repos", ha="center", va="center", fontsize=14)
+        ax.set_title("Most Starred Repos You Contributed To")
+        fig.tight_layout()
+        charts.save(fig, "starred_repos.png")
+
+
+def main():
+    render(collect(load_store(sources=needed_sources(CHARTS.values()))))
+    print("✅ Social metrics generated successfully!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Bare git mirrors of the user's repositories, for per-commit stats.
+
+With ``DASHBOARD_GIT_MIRROR=1`` the sync reads commit stats (lines added and
+deleted) and touched files from a local mirror instead of one
+``/commits/{sha}`` request per commit. Each repository's branches are
+mirrored under ``MIRROR_DIR`` (``.cache/mirrors`` by default). The first run
+clones them and later runs update them with an incremental ``git fetch``.
+Every listed commit then gets stats, not just the most recent
+``github_api.DETAIL_LIMIT``.
+
+``commit_stats`` streams ``git log --numstat -z`` and yields the same
+figures the REST API reports: merges are diffed against their first parent,
+binary files count as no lines, and a renamed file is reported under its
+new name.
+"""
+
+import base64
+import os
+import subprocess
+from pathlib import Path
+
+
+ENABLED = os.environ.get("DASHBOARD_GIT_MIRROR") == "1"
+MIRROR_DIR = Path(os.environ.get("DASHBOARD_MIRROR_DIR", ".cache/mirrors"))
+# Only branches: GitHub's refs/pull/* would multiply what a mirror downloads
+REFSPEC = "+refs/heads/*:refs/heads/*"
+
+
+class MirrorError(RuntimeError):
+    """A git command failed; the caller falls back to the API."""
+
+
+def _git(*args, token=None, **kwargs):
+    env = None
+    if token:
+        # Passed through the environment rather than ``-c``, so the token is
+        # neither written to the mirror's config nor visible in ``ps``
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        count = int(os.environ.get("GIT_CONFIG_COUNT", "0"))
+        env = {
+            **os.environ,
+            "GIT_CONFIG_COUNT": str(count + 1),
+            f"GIT_CONFIG_KEY_{count}": "http.extraHeader",
+            f"GIT_CONFIG_VALUE_{count}": f"Authorization: Basic {basic}",
+        }
+    try:
+        return subprocess.run(["git", *args], check=True, capture_output=True, env=env, **kwargs)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        detail = (getattr(exc, "stderr", b"") or b"").decode(errors="replace").strip()
+        raise MirrorError(detail.splitlines()[0] if detail else str(exc)) from exc
+
+
+def sync(name, clone_url, token=None):
+    """Clone or fetch the mirror of repository ``name``; returns its path."""
+    path = MIRROR_DIR / f"{name}.git"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _git("init", "--quiet", "--bare", str(path))
+    _git("-C", str(path), "fetch", "--quiet", "--prune", "--no-tags", clone_url, REFSPEC, token=token)
+    return path
+
+
+def _tokens(stream, chunk_size=1 << 16):
+    """NUL-separated fields of ``stream``, decoded."""
+    rest = b""
+    while chunk := stream.read(chunk_size):
+        *fields, rest = (rest + chunk).split(b"\0")
+        for field in fields:
+            yield field.decode(errors="replace")
+    if rest:
+        yield rest.decode(errors="replace")
+
+
+def commit_stats(path, shas):
+    """``(sha, additions, deletions, filenames)`` for each of ``shas`` on a mirrored branch."""
+    wanted = set(shas)
+    if not wanted:
+        return
+    command = ["git", "-C", str(path), "log", "--branches", "--numstat", "-z", "--diff-merges=first-parent", "--format=%x01%H"]
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+        fields = _tokens(process.stdout)
+        sha, additions, deletions, filenames = None, 0, 0, []
+        for field in fields:
+            if field.startswith("\x01"):
+                if sha in wanted:
+                    yield sha, additions, deletions, filenames
+                    wanted.discard(sha)
+                    if not wanted:
+                        process.kill()
+                        return
+                sha, additions, deletions, filenames = field[1:], 0, 0, []
+                continue
+            # The numstat block follows the header after one newline
+            field = field.removeprefix("\n")
+            if not field:
+                continue
+            added, deleted, filename = field.split("\t", 2)
+            if not filename:
+                # Rename: the old and new names follow as fields of their own
+                next(fields)
+                filename = next(fields)
+            additions += int(added) if added != "-" else 0
+            deletions += int(deleted) if deleted != "-" else 0
+            filenames.append(filename)
+        if sha in wanted:
+            yield sha, additions, deletions, filenames
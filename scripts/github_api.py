@@ -0,0 +1,455 @@
+"""Shared GitHub REST client with an on-disk, revalidating response cache.
+
+Every generator fetches through this module instead of calling
+``requests.get`` directly. Successful responses are stored under
+``DASHBOARD_CACHE_DIR`` keyed by URL and request headers; the next request
+for the same resource sends ``If-None-Match`` / ``If-Modified-Since`` so an
+unchanged resource comes back as a 304, which GitHub does not count against
+the rate limit.
+
+Requests go through a scheduler that reads ``X-RateLimit-Remaining`` and
+``X-RateLimit-Reset``: once the remaining budget falls to
+``DASHBOARD_RATE_RESERVE`` the rest is spread evenly over the time left
+until the window resets. Throttled (403/429) and failed (5xx, connection
+error, timeout) requests are retried, honoring ``Retry-After`` or else
+backing off exponentially with jitter. A request that still fails raises,
+so a run slows down under load instead of rendering from partial data.
+
+``traffic()`` returns this process's running totals: requests sent, cache
+hits, 304 revalidations, response bytes, and seconds spent waiting on HTTP
+and decoding JSON; ``report`` attributes them to sections of a run.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+
+# GitHub Actions sets GITHUB_API_URL (e.g. for GitHub Enterprise); benchmarks
+# point it at a local fake server.
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+CACHE_DIR = Path(os.environ.get("DASHBOARD_CACHE_DIR", ".cache/github"))
+CACHE_MAX_BYTES = int(os.environ.get("DASHBOARD_CACHE_MAX_MB", "256")) * 1024 * 1024
+# Eviction trims the cache to this share of its limit, so it runs once per many writes
+CACHE_LOW_WATER = 0.8
+PAGE_SIZE = 100
+# Listings that fan out into one request per item (commit details, reviews)
+# stop after this many items per repository.
+DETAIL_LIMIT = int(os.environ.get("DASHBOARD_DETAIL_LIMIT", "100"))
+MAX_IN_FLIGHT = int(os.environ.get("DASHBOARD_CONCURRENCY", "8"))
+REQUEST_TIMEOUT = float(os.environ.get("DASHBOARD_TIMEOUT", "30"))
+MAX_RETRIES = int(os.environ.get("DASHBOARD_MAX_RETRIES", "5"))
+RATE_RESERVE = int(os.environ.get("DASHBOARD_RATE_RESERVE", "100"))
+# Longest single pause (seconds) before giving up instead of sleeping
+MAX_WAIT = float(os.environ.get("DASHBOARD_MAX_WAIT", "900"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class RateLimitError(requests.HTTPError):
+    """GitHub kept throttling a request after every retry."""
+
+
+class BudgetExceeded(RuntimeError):
+    """A ``budget`` block used up its request allowance."""
+
+
+@dataclass
+class Response:
+    """The parts of a GitHub response the generators use."""
+
+    status_code: int
+    body: object
+    headers: dict = field(default_factory=dict)
+    from_cache: bool = False
+
+    def json(self):
+        return self.body
+
+
+class ResponseCache:
+    """Directory of cached responses, evicted least-recently-used by size.
+
+    Each entry is one JSON file; its modification time doubles as the last
+    access time so eviction needs no separate index.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._bytes = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            self._bytes = self.size() + len(data) - previous
+            if self._bytes > self.max_bytes:
+                self.evict()
+
+    def size(self):
+        if self._bytes is None:
+            self._bytes = sum(p.stat().st_size for p in self.directory.glob("*/*.json"))
+        return self._bytes
+
+    def evict(self):
+        """Drop the least recently used entries until the cache is down to its low-water mark."""
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * CACHE_LOW_WATER
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._bytes = total
+
+
+class RateLimiter:
+    """Token bucket refilled from GitHub's rate-limit headers.
+
+    Above ``reserve`` remaining requests every request goes straight out.
+    Below it, requests are released one at a time at ``remaining / seconds
+    until reset``, and with nothing left they wait for the reset.
+    """
+
+    def __init__(self, reserve=RATE_RESERVE):
+        self.reserve = reserve
+        self.remaining = None
+        self.reset = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self._lock:
+            self.remaining = int(remaining)
+            self.reset = float(reset)
+
+    def delay(self):
+        """Reserve the next request slot and return how long to wait for it."""
+        with self._lock:
+            now = time.time()
+            if self.remaining is None or self.remaining > self.reserve:
+                wait = 0.0
+            elif self.remaining <= 0:
+                wait = max(self.reset - now, 0.0)
+            else:
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + max(self.reset - now, 0.0) / self.remaining
+                wait = slot - now
+            if self.remaining:
+                self.remaining -= 1
+        return wait
+
+    def acquire(self):
+        wait = self.delay()
+        if wait > MAX_WAIT:
+            raise RateLimitError(f"rate limit resets in {wait:.0f}s, longer than DASHBOARD_MAX_WAIT")
+        if wait:
+            time.sleep(wait)
+
+
+_session = requests.Session()
+# One pool per host, sized so every worker in fetch_many keeps its connection alive.
+_adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_IN_FLIGHT)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+_cache = ResponseCache()
+_limiter = RateLimiter()
+_budget = None
+_budget_lock = threading.Lock()
+_traffic = {"requests": 0, "cache_hits": 0, "not_modified": 0, "bytes": 0, "http_seconds": 0.0, "parse_seconds": 0.0}
+_traffic_lock = threading.Lock()
+# Keys already revalidated by this process; generators re-read the same
+# listings many times and they cannot change within a single run.
+_fresh = set()
+
+
+def cache_key(url, headers):
+    material = json.dumps([url, sorted((k.lower(), v) for k, v in headers.items())])
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def traffic():
+    """Snapshot of this process's request counters since it started."""
+    with _traffic_lock:
+        return dict(_traffic)
+
+
+def _count(**amounts):
+    with _traffic_lock:
+        for key, amount in amounts.items():
+            _traffic[key] += amount
+
+
+@contextmanager
+def budget(name, limit):
+    """Allow at most ``limit`` network requests inside the block.
+
+    The request that would exceed it raises ``BudgetExceeded`` instead of
+    being sent. Responses served from this run's cache are free, and a
+    ``limit`` of None means unlimited.
+    """
+    global _budget
+    outer = _budget
+    _budget = {"name": name, "limit": limit, "used": 0}
+    try:
+        yield _budget
+    finally:
+        _budget = outer
+
+
+def _charge():
+    with _budget_lock:
+        if _budget is None or _budget["limit"] is None:
+            return
+        if _budget["used"] >= _budget["limit"]:
+            raise BudgetExceeded(f"request budget for {_budget['name']} ({_budget['limit']}) used up")
+        _budget["used"] += 1
+
+
+def _backoff(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying ``response``, or None if it is final."""
+    status = response.status_code
+    if status == 403:
+        throttled = response.headers.get("X-RateLimit-Remaining") == "0" or "rate limit" in response.text.lower()
+        if not throttled:
+            return None
+    elif status != 429 and status < 500:
+        return None
+    if "Retry-After" in response.headers:
+        return float(response.headers["Retry-After"])
+    if response.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in response.headers:
+        return max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0.0) + 1
+    return _backoff(attempt)
+
+
+def _send(url, headers, **kwargs):
+    """GET through the scheduler, retrying throttled and failed requests."""
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    for attempt in range(MAX_RETRIES + 1):
+        _charge()
+        _limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = _session.get(url, headers=headers, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            _count(requests=1, http_seconds=time.perf_counter() - started)
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+        _count(requests=1, bytes=len(response.content), http_seconds=time.perf_counter() - started)
+        _limiter.update(response.headers)
+        wait = _retry_delay(response, attempt)
+        if wait is None:
+            return response
+        if attempt == MAX_RETRIES or wait > MAX_WAIT:
+            if response.status_code >= 500:
+                response.raise_for_status()
+            raise RateLimitError(f"{response.status_code} from {url} after {attempt + 1} attempts", response=response)
+        time.sleep(wait)
+
+
+def fetch(url, headers=None, params=None, **kwargs):
+    """GET ``url``, revalidating against the cache when an entry exists."""
+    headers = dict(headers or {})
+    url = requests.Request("GET", url, params=params).prepare().url
+    key = cache_key(url, headers)
+    cached = _cache.get(key)
+    if cached and key in _fresh:
+        _count(cache_hits=1)
+        return Response(200, cached["body"], cached.get("headers", {}), from_cache=True)
+
+    request_headers = dict(headers)
+    if cached:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = _send(url, request_headers, **kwargs)
+    if response.status_code == 304 and cached:
+        _count(not_modified=1)
+        _fresh.add(key)
+        return Response(200, cached["body"], cached.get("headers", {}), from_cache=True)
+
+    started = time.perf_counter()
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    _count(parse_seconds=time.perf_counter() - started)
+    kept_headers = {k: response.headers[k] for k in ("Link", "ETag", "Last-Modified") if k in response.headers}
+    if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+        _cache.put(
+            key,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "headers": kept_headers,
+                "body": body,
+            },
+        )
+        _fresh.add(key)
+    return Response(response.status_code, body, kept_headers)
+
+
+def get_json(url, headers=None, params=None, **kwargs):
+    """Return the decoded JSON body for ``url``."""
+    return fetch(url, headers=headers, params=params, **kwargs).body
+
+
+def _with_query(url, params):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.update({k: v for k, v in params.items() if v is not None})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _field(record, path):
+    for part in path.split("."):
+        record = record.get(part) if isinstance(record, dict) else None
+    return record
+
+
+def paginate(url, headers=None, params=None, *, max_items=None, since=None, floor=None, date_field=None, items_key=None, empty_on=(), **kwargs):
+    """Yield every record of a list endpoint, following ``Link: rel="next"``.
+
+    Pages are requested ``PAGE_SIZE`` at a time and records are yielded as
+    they arrive, so callers can stop early without fetching later pages.
+
+    ``max_items`` stops after that many records. ``since`` is passed through
+    to endpoints that filter server-side (commits, issues). ``floor`` is an
+    ISO 8601 UTC timestamp: iteration stops at the first record whose
+    ``date_field`` (a dotted path such as ``commit.author.date``) is older,
+    which suits endpoints that return newest first. ``items_key`` names the
+    list inside wrapped responses such as ``actions/runs``. Remaining
+    keyword arguments are passed to ``fetch`` for every page.
+
+    A page that is not a 2xx raises ``requests.HTTPError``, so a failed
+    listing is never mistaken for a short one; statuses in ``empty_on``
+    (e.g. 409 for the commits of an empty repository) end it instead.
+    """
+    if max_items is not None and max_items <= 0:
+        return
+    yielded = 0
+    for response in _pages(url, headers, {**(params or {}), "per_page": PAGE_SIZE, "since": since}, **kwargs):
+        if response.status_code in empty_on:
+            return
+        raise_for_status(response, url)
+        page = response.body
+        if items_key is not None:
+            page = page.get(items_key, []) if isinstance(page, dict) else []
+        if not isinstance(page, list):
+            return
+        for record in page:
+            if floor is not None and (_field(record, date_field) or "") < floor:
+                return
+            yield record
+            yielded += 1
+            if max_items is not None and yielded >= max_items:
+                return
+
+
+def raise_for_status(response, url):
+    """Raise ``requests.HTTPError`` for a ``Response`` that is not a 2xx, with GitHub's message."""
+    if 200 <= response.status_code < 300:
+        return
+    message = response.body.get("message") if isinstance(response.body, dict) else None
+    raise requests.HTTPError(f"{response.status_code} from {url}" + (f": {message}" if message else ""))
+
+
+def _pages(url, headers=None, params=None, **kwargs):
+    """Yield the ``Response`` of each page of a list endpoint, following ``Link: rel="next"``."""
+    next_url = _with_query(url, params or {})
+    while next_url:
+        response = fetch(next_url, headers=headers, **kwargs)
+        yield response
+        links = requests.utils.parse_header_links(response.headers.get("Link", ""))
+        next_url = next((link["url"] for link in links if link.get("rel") == "next"), None)
+
+
+def _fetch_list(url, headers=None, **kwargs):
+    """One ``Response`` holding every record of a list endpoint, or the first page that was not a 200 list."""
+    records = []
+    for response in _pages(url, headers, {"per_page": PAGE_SIZE}, **kwargs):
+        if response.status_code != 200 or not isinstance(response.body, list):
+            return response
+        records.extend(response.body)
+    return Response(200, records)
+
+
+def fetch_many(urls, headers=None, *, pages=False, responses=False, ignore_errors=False, max_in_flight=MAX_IN_FLIGHT, **kwargs):
+    """Fetch a batch of URLs concurrently and yield their bodies in input order.
+
+    At most ``max_in_flight`` requests run at once over the shared connection
+    pool. With ``pages=True`` each URL is a list endpoint and yields the full
+    paginated list. With ``responses=True`` each URL yields its ``Response``
+    instead, so an error body can be told from data; a list's is the first
+    page that failed, if any. With ``ignore_errors=True`` a URL whose
+    request fails yields ``None`` (or ``[]`` for lists) instead of aborting
+    the batch.
+    """
+
+    def load(url):
+        try:
+            if responses:
+                return _fetch_list(url, headers=headers, **kwargs) if pages else fetch(url, headers=headers, **kwargs)
+            if pages:
+                return list(paginate(url, headers=headers, **kwargs))
+            return get_json(url, headers=headers, **kwargs)
+        except requests.RequestException:
+            if not ignore_errors:
+                raise
+            return [] if pages and not responses else None
+
+    urls = list(urls)
+    if not urls:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(urls)))) as executor:
+        yield from executor.map(load, urls)
@@ -0,0 +1,615 @@
+"""Copy the GitHub data the charts need from the API into the local store.
+
+The scope mirrors what the generators read: the repository listing and
+languages for every repository, workflow runs for the first
+``RUN_REPOS``, commit, pull request, issue and review history for the first
+``HISTORY_REPOS``, and branch statistics and merged pull requests' commit
+stats for the first ``BRANCH_REPOS``.
+
+History is synced incrementally. The store keeps a high-water mark per
+repository and resource in ``sync_state`` and later runs only request what
+changed since: commits down to where their history joins the stored
+listing, pull requests sorted by ``updated`` down to the last seen
+``updated_at``, ``issues?since=`` and ``actions/runs?created=>=``. A repository without a mark, or every
+repository when ``DASHBOARD_FULL_SYNC=1``, is downloaded in full.
+
+Reviews form one index shared by the approval rate, review latency and
+review karma charts. It covers the most recent ``github_api.DETAIL_LIMIT``
+pull requests and the most recent as many closed ones, and only pull
+requests whose ``updated_at`` moved since their reviews were fetched are
+requested again.
+
+Workflow runs, history, branches and merge commits are synced one
+repository at a time under a request budget per phase, set as
+``DASHBOARD_BUDGETS`` (e.g. ``runs=200,history=3000,branches=300``). Once
+a phase's budget is used up its remaining repositories keep their previous
+data and catch up on the next run.
+
+``ingest`` can be limited to some ``SOURCES`` (the resources a subset of
+charts reads, see ``needed_sources``, ``run_all --only`` and the
+generators run on their own); the repository listing is always refreshed
+and the other sources keep their data and sync marks.
+
+Resources that only change with a push or a settings change (languages,
+topics, contributors, commits and branches) are skipped entirely for a
+repository whose ``pushed_at`` / ``updated_at`` (see ``STAMPS``) still
+equals the value recorded when they were last synced; issues, pull
+requests and workflow runs change independently and are always synced.
+
+Commit stats and touched files come from ``/commits/{sha}`` for the most
+recent ``github_api.DETAIL_LIMIT`` commits, or, with
+``DASHBOARD_GIT_MIRROR=1``, for every commit from a local git mirror (see
+``git_mirror``).
+
+Running totals in ``aggregates`` are folded forward after every sync.
+
+``ingest_event`` applies one GitHub webhook event to the same tables, for
+the event-driven receiver in ``webhook``.
+
+Set ``DASHBOARD_OFFLINE=1`` to render from the existing store without
+touching the API.
+"""
+
+import os
+import sys
+from datetime import timedelta, timezone
+
+import requests
+
+import aggregates
+import git_mirror
+import github_api
+import report
+from dataset import Dataset
+from store import Store
+from utils.time import parse_github_timestamp, utc_now
+
+
+RUN_REPOS = 20
+HISTORY_REPOS = 10
+BRANCH_REPOS = 5
+OFFLINE = os.environ.get("DASHBOARD_OFFLINE") == "1"
+FULL_SYNC = os.environ.get("DASHBOARD_FULL_SYNC") == "1"
+# Margin for clock skew between this machine and GitHub on time-based cursors
+SYNC_OVERLAP = timedelta(minutes=5)
+# What a chart can read, in sync order; "repos" (the listing) is always synced
+SOURCES = (
+    "profile", "repos", "languages", "runs",
+    "topics", "contributors", "commits", "issues", "pulls", "reviews",
+    "branches", "merge_commits",
+)
+HISTORY = ("topics", "contributors", "commits", "issues", "pulls", "reviews")
+# Webhook events ingest_event applies
+EVENTS = ("push", "pull_request", "pull_request_review", "issues", "workflow_run")
+# Repository field that moves whenever the resource can change
+STAMPS = {
+    "languages": "pushed_at",
+    "topics": "updated_at",
+    "contributors": "pushed_at",
+    "commits": "pushed_at",
+    "branches": "pushed_at",
+}
+BUDGETS = {
+    phase: int(limit)
+    for phase, _, limit in (item.partition("=") for item in os.environ.get("DASHBOARD_BUDGETS", "").split(",") if item)
+}
+
+
+def needed_sources(charts):
+    """The ``SOURCES`` that charts reading the given source tuples need, in sync order."""
+    needed = {"repos"}.union(*charts)
+    return [source for source in SOURCES if source in needed]
+
+
+def _login(record):
+    return (record.get("user") or {}).get("login")
+
+
+def _timestamp(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def ingest_profile(data, store):
+    user = data.user() or {}
+    store.replace(
+        "profile",
+        [{"key": "login", "value": data.username}]
+        + [{"key": key, "value": user.get(key, 0)} for key in ("followers", "following")],
+    )
+    store.replace("orgs", [{"login": org.get("login")} for org in data.orgs()])
+    store.replace("starred", [{"full_name": repo.get("full_name") or str(repo.get("id"))} for repo in data.starred()])
+
+
+def ingest_repos(data, store):
+    store.replace(
+        "repos",
+        [
+            {
+                "name": repo["name"],
+                "position": position,
+                "fork": int(bool(repo.get("fork"))),
+                "size": repo.get("size", 0),
+                "stargazers_count": repo.get("stargazers_count", 0),
+                "forks_count": repo.get("forks_count", 0),
+                "watchers_count": repo.get("watchers_count", 0),
+                "open_issues_count": repo.get("open_issues_count", 0),
+                "allow_auto_merge": int(bool(repo.get("allow_auto_merge"))),
+                "languages_url": repo.get("languages_url"),
+                "created_at": repo.get("created_at"),
+                "updated_at": repo.get("updated_at"),
+                "pushed_at": repo.get("pushed_at"),
+            }
+            for position, repo in enumerate(data.repos)
+        ],
+    )
+
+
+def ingest_languages(data, store):
+    for repo in data.repos:
+        if _unchanged(store, repo, "languages"):
+            continue
+        languages = data.languages(repo)
+        if languages is None:
+            # Left as stored and unstamped, so the next run asks again
+            continue
+        store.replace(
+            "repo_languages",
+            [{"repo": repo["name"], "language": lang, "bytes": size} for lang, size in languages.items()],
+            repo=repo["name"],
+        )
+        _stamp(store, repo, "languages")
+
+
+def ingest_commits(data, store, repo, full=True):
+    """Prepend commits not yet listed to the listing (or reload all of them).
+
+    Returns whether every commit detail that was asked for was filled in.
+    """
+    name = repo["name"]
+    if full:
+        store.db.execute("DELETE FROM commits WHERE repo = ?", (name,))
+        store.db.execute("DELETE FROM commit_files WHERE repo = ?", (name,))
+        commits = data.commits(name)
+    else:
+        listed = set(store.column("SELECT sha FROM commits WHERE repo = ? AND position IS NOT NULL", name))
+        commits = data.new_commits(name, listed)
+    _prepend_commits(store, name, commits)
+    mirror = data.mirror(repo)
+    # A mirror has stats for every listed commit; the API is asked for the most recent only
+    missing = store.column(
+        "SELECT sha FROM commits WHERE repo = ? AND position < ? AND additions IS NULL ORDER BY position",
+        name, sys.maxsize if mirror else github_api.DETAIL_LIMIT,
+    )
+    return ingest_commit_details(data, store, name, missing, mirror)
+
+
+def _prepend_commits(store, name, commits):
+    """Put listing records ``commits`` (newest first) ahead of the ones already listed."""
+    listed = set(store.column("SELECT sha FROM commits WHERE repo = ? AND position IS NOT NULL", name))
+    new = [c for c in commits if c["sha"] not in listed]
+    store.db.execute(
+        "UPDATE commits SET position = position + ? WHERE repo = ? AND position IS NOT NULL", (len(new), name)
+    )
+    store.db.executemany(
+        "INSERT INTO commits (repo, sha, position, author, authored_at, message) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (repo, sha) DO UPDATE SET position = excluded.position, author = excluded.author",
+        [
+            (
+                name,
+                c["sha"],
+                position,
+                (c.get("author") or {}).get("login") or c["commit"]["author"].get("name"),
+                c["commit"]["author"]["date"],
+                c["commit"]["message"],
+            )
+            for position, c in enumerate(new)
+        ],
+    )
+
+
+def ingest_commit_details(data, store, repo, shas, mirror=None):
+    """Fill in stats and touched files for the given commits, from ``mirror`` where it has them.
+
+    Returns False if a detail request failed.
+    """
+    store.db.executemany(
+        "DELETE FROM commit_files WHERE repo = ? AND sha = ?",
+        [(repo, sha) for sha in shas],
+    )
+    found = set()
+    if mirror:
+        for sha, additions, deletions, filenames in git_mirror.commit_stats(mirror, shas):
+            store.db.execute(
+                "INSERT INTO commits (repo, sha, additions, deletions) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (repo, sha) DO UPDATE SET additions = excluded.additions, deletions = excluded.deletions",
+                (repo, sha, additions, deletions),
+            )
+            store.upsert("commit_files", [{"repo": repo, "sha": sha, "filename": filename} for filename in filenames])
+            found.add(sha)
+    rest = [sha for sha in shas if sha not in found][:github_api.DETAIL_LIMIT]
+    complete = True
+    for sha, detail in zip(rest, data.commit_details(repo, rest)):
+        if not detail:
+            # The request failed: additions stays NULL, so the next run asks again
+            complete = False
+            continue
+        stats = detail.get("stats") or {}
+        commit = detail.get("commit") or {}
+        store.db.execute(
+            "INSERT INTO commits (repo, sha, authored_at, message, additions, deletions) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (repo, sha) DO UPDATE SET additions = excluded.additions, deletions = excluded.deletions",
+            (
+                repo,
+                sha,
+                (commit.get("author") or {}).get("date"),
+                commit.get("message"),
+                stats.get("additions", 0),
+                stats.get("deletions", 0),
+            ),
+        )
+        store.upsert(
+            "commit_files",
+            [{"repo": repo, "sha": sha, "filename": f["filename"]} for f in detail.get("files", [])],
+        )
+    return complete
+
+
+def _replace_labels(store, repo, records):
+    store.db.executemany("DELETE FROM labels WHERE repo = ? AND number = ?", [(repo, r["number"]) for r in records])
+    store.upsert(
+        "labels",
+        [{"repo": repo, "number": r["number"], "name": label["name"]} for r in records for label in r.get("labels", [])],
+    )
+
+
+def ingest_pulls(data, store, repo, after=None):
+    """Merge pull requests updated at or after ``after`` (or reload all of them)."""
+    name = repo["name"]
+    if after is None:
+        pulls = data.pulls(name)
+        store.db.execute("DELETE FROM pulls WHERE repo = ?", (name,))
+    else:
+        pulls = data.updated_pulls(name, after)
+    # Updated in place, so reviewed_at survives a pull request being listed again
+    store.upsert("pulls", [_pull_row(name, pr) for pr in pulls], key=("repo", "number"))
+    _rank_pulls(store, name)
+    _replace_labels(store, name, pulls)
+
+
+def _pull_row(repo, pr):
+    return {
+        "repo": repo,
+        "number": pr["number"],
+        "state": pr.get("state"),
+        "author": _login(pr),
+        "created_at": pr.get("created_at"),
+        "updated_at": pr.get("updated_at"),
+        "closed_at": pr.get("closed_at"),
+        "merged_at": pr.get("merged_at"),
+        "merge_commit_sha": pr.get("merge_commit_sha"),
+        "comments": pr.get("comments", 0),
+        "review_comments": pr.get("review_comments", 0),
+        "mergeable_state": pr.get("mergeable_state"),
+        "url": pr.get("url"),
+    }
+
+
+def _rank_pulls(store, repo):
+    # Positions follow the API's default listing order: newest created first.
+    store.db.execute(
+        "UPDATE pulls SET position = ranked.rank FROM "
+        "(SELECT number, ROW_NUMBER() OVER (ORDER BY created_at DESC, number DESC) - 1 AS rank "
+        " FROM pulls WHERE repo = ?) AS ranked "
+        "WHERE pulls.repo = ? AND pulls.number = ranked.number",
+        (repo, repo),
+    )
+
+
+def ingest_reviews(data, store, repo):
+    """Refresh the review index for pull requests updated since their reviews were fetched."""
+    name = repo["name"]
+    store.db.execute(
+        "DELETE FROM reviews WHERE repo = ? AND pull_number NOT IN (SELECT number FROM pulls WHERE repo = ?)",
+        (name, name),
+    )
+    # The most recent pull requests and the most recent closed ones
+    changed = [dict(row) for row in store.query(
+        "SELECT number, url, merged_at FROM pulls WHERE repo = ? AND reviewed_at IS NOT updated_at AND number IN ("
+        " SELECT number FROM pulls WHERE repo = ? AND position < ? UNION"
+        " SELECT * FROM (SELECT number FROM pulls WHERE repo = ? AND state = 'closed' ORDER BY position LIMIT ?))",
+        name, name, github_api.DETAIL_LIMIT, name, github_api.DETAIL_LIMIT,
+    )]
+    # Pull requests whose reviews could not be listed keep their old ones and are asked again next run
+    fetched = [(pr, reviews) for pr, reviews in zip(changed, data.reviews(changed)) if reviews is not None]
+    store.db.executemany(
+        "DELETE FROM reviews WHERE repo = ? AND pull_number = ?", [(name, pr["number"]) for pr, _ in fetched]
+    )
+    store.upsert("reviews", [_review_row(name, pr["number"], review) for pr, reviews in fetched for review in reviews])
+    store.db.executemany(
+        "UPDATE pulls SET reviewed_at = updated_at WHERE repo = ? AND number = ?", [(name, pr["number"]) for pr, _ in fetched]
+    )
+
+
+def _review_row(repo, number, review):
+    return {
+        "id": review["id"],
+        "repo": repo,
+        "pull_number": number,
+        "reviewer": _login(review),
+        "state": review.get("state"),
+        "submitted_at": review.get("submitted_at"),
+    }
+
+
+def ingest_issues(data, store, repo, since=None):
+    """Merge issues updated since ``since`` (or reload all of them)."""
+    name = repo["name"]
+    if since is None:
+        store.db.execute("DELETE FROM issues WHERE repo = ?", (name,))
+        store.db.execute("DELETE FROM labels WHERE repo = ?", (name,))
+    issues = data.issues(name, since=since)
+    store.upsert("issues", [_issue_row(name, issue) for issue in issues])
+    _replace_labels(store, name, issues)
+
+
+def _issue_row(repo, issue):
+    return {
+        "repo": repo,
+        "number": issue["number"],
+        "state": issue.get("state"),
+        "author": _login(issue),
+        "created_at": issue.get("created_at"),
+        "updated_at": issue.get("updated_at"),
+        "closed_at": issue.get("closed_at"),
+        "body": issue.get("body"),
+        "is_pull_request": int("pull_request" in issue),
+    }
+
+
+def ingest_branches(data, store, repo):
+    """Count commits per branch, recounting only branches whose head moved.
+
+    The default branch is counted once per repository: from its stored
+    count and one compare of its old head against the new, or from the
+    stored commit listing when that already starts at the new head.
+    Another branch costs one compare against the default branch,
+    ``default - behind_by + ahead_by``. A branch's own listing is only
+    requested when GitHub cannot compare.
+    """
+    name = repo["name"]
+    if _unchanged(store, repo, "branches"):
+        return
+    default = repo.get("default_branch")
+    known = {row["name"]: row for row in store.query("SELECT * FROM branches WHERE repo = ?", name)}
+    heads = {branch["name"]: (branch.get("commit") or {}).get("sha") for branch in data.branches(name)}
+
+    def moved(branch):
+        previous = known.get(branch)
+        return not (heads[branch] and previous is not None and previous["head_sha"] == heads[branch])
+
+    def count_default():
+        previous = known.get(default)
+        if not moved(default):
+            return previous["commit_count"]
+        if previous is not None and previous["head_sha"]:
+            compared = data.compare(name, previous["head_sha"], heads[default])
+            if compared:
+                return previous["commit_count"] - compared["behind_by"] + compared["ahead_by"]
+        if heads[default] and store.scalar("SELECT sha FROM commits WHERE repo = ? AND position = 0", name) == heads[default]:
+            return store.scalar("SELECT COUNT(*) FROM commits WHERE repo = ? AND position IS NOT NULL", name)
+        return len(data.commits(name))
+
+    default_count = count_default() if default in heads and any(moved(branch) for branch in heads) else None
+
+    def count(branch):
+        if not moved(branch):
+            return known[branch]["commit_count"]
+        if branch == default:
+            return default_count
+        if default_count is not None:
+            compared = data.compare(name, default, branch)
+            if compared:
+                return default_count - compared["behind_by"] + compared["ahead_by"]
+        return len(data.commits(name, sha=branch))
+
+    rows = [{"repo": name, "name": branch, "head_sha": head, "commit_count": count(branch)} for branch, head in heads.items()]
+    store.replace("branches", rows, repo=name)
+    _stamp(store, repo, "branches")
+
+
+def ingest_merge_commits(data, store, repo):
+    """Fill in stats for the merge commits of the most recent closed pull requests."""
+    name = repo["name"]
+    merge_shas = store.column(
+        "SELECT p.merge_commit_sha FROM "
+        "(SELECT merge_commit_sha, merged_at FROM pulls WHERE repo = ? AND state = 'closed' ORDER BY position LIMIT ?) p "
+        "LEFT JOIN commits c ON c.repo = ? AND c.sha = p.merge_commit_sha "
+        "WHERE p.merged_at IS NOT NULL AND p.merge_commit_sha IS NOT NULL AND c.additions IS NULL",
+        name, github_api.DETAIL_LIMIT, name,
+    )
+    if merge_shas:
+        ingest_commit_details(data, store, name, merge_shas, data.mirror(repo))
+
+
+def ingest_workflow_runs(data, store, repo, created_after=None):
+    """Merge runs created at or after ``created_after`` (or reload all of them)."""
+    name = repo["name"]
+    if created_after is None:
+        store.db.execute("DELETE FROM workflow_runs WHERE repo = ?", (name,))
+    store.upsert("workflow_runs", [_run_row(name, run) for run in data.workflow_runs(name, created_after=created_after)])
+    # Resume from the oldest run still in progress so its outcome is picked up.
+    store.set_cursor(name, "workflow_runs", store.scalar(
+        "SELECT COALESCE(MIN(CASE WHEN status != 'completed' THEN created_at END), MAX(created_at), '') "
+        "FROM workflow_runs WHERE repo = ?",
+        name,
+    ))
+
+
+def _run_row(repo, run):
+    return {
+        "id": run["id"],
+        "repo": repo,
+        "event": run.get("event"),
+        "status": run.get("status"),
+        "conclusion": run.get("conclusion"),
+        "created_at": run.get("created_at"),
+        "run_started_at": run.get("run_started_at"),
+        "updated_at": run.get("updated_at"),
+    }
+
+
+def _cursor(store, repo, resource):
+    if FULL_SYNC:
+        return None
+    return store.cursor(repo["name"], resource) or None
+
+
+def _unchanged(store, repo, resource):
+    """Whether ``resource`` was synced since ``repo`` last moved its ``STAMPS`` field."""
+    stamp = repo.get(STAMPS[resource])
+    return not FULL_SYNC and bool(stamp) and store.cursor(repo["name"], f"{resource}_stamp") == stamp
+
+
+def _stamp(store, repo, resource):
+    store.set_cursor(repo["name"], f"{resource}_stamp", repo.get(STAMPS[resource]) or "")
+
+
+def ingest_history(data, store, repo, started, sources=HISTORY):
+    """Sync topics, contributors, commits, issues, pull requests and reviews of one repository."""
+    name = repo["name"]
+    if "topics" in sources and not _unchanged(store, repo, "topics"):
+        topics = data.topics(repo)
+        if topics is not None:
+            store.replace("repo_topics", [{"repo": name, "topic": t} for t in topics], repo=name)
+            _stamp(store, repo, "topics")
+    if "contributors" in sources and not _unchanged(store, repo, "contributors"):
+        store.replace(
+            "contributors",
+            [{"repo": name, "login": c.get("login"), "contributions": c.get("contributions", 0)} for c in data.contributors(name)],
+            repo=name,
+        )
+        _stamp(store, repo, "contributors")
+    if "commits" in sources and not _unchanged(store, repo, "commits"):
+        # The mark only records that the listing was loaded; see Dataset.new_commits
+        full = _cursor(store, repo, "commits") is None
+        if full:
+            aggregates.reset(store, name)
+        complete = ingest_commits(data, store, repo, full)
+        store.set_cursor(name, "commits", started)
+        # Unstamped while details are missing, so the next run retries them
+        if complete:
+            _stamp(store, repo, "commits")
+    if "issues" in sources:
+        ingest_issues(data, store, repo, _cursor(store, repo, "issues"))
+        store.set_cursor(name, "issues", started)
+    if "pulls" in sources:
+        ingest_pulls(data, store, repo, _cursor(store, repo, "pulls"))
+        store.set_cursor(name, "pulls", store.scalar("SELECT COALESCE(MAX(updated_at), '') FROM pulls WHERE repo = ?", name))
+    if "reviews" in sources:
+        ingest_reviews(data, store, repo)
+
+
+def _each_repo(store, phase, repos, sync):
+    """Run ``sync(repo)`` for each repository, atomically, within the phase's budget."""
+    with report.span(f"sync.{phase}"), github_api.budget(phase, BUDGETS.get(phase)):
+        for repo in repos:
+            try:
+                with store.savepoint():
+                    sync(repo)
+            except github_api.BudgetExceeded as exc:
+                print(f"⚠️ {exc}; {repo['name']} and later repositories sync on the next run")
+                return
+            except github_api.RateLimitError:
+                raise
+            except requests.HTTPError as exc:
+                # Rolled back: a failed listing must not replace what is stored
+                print(f"⚠️ {repo['name']} not synced: {exc}")
+
+
+def ingest(data, store, sources=SOURCES):
+    """Refresh the tables of ``sources`` from the API, fetching only what changed where possible."""
+    started = _timestamp(utc_now() - SYNC_OVERLAP)
+    if "profile" in sources:
+        with report.span("sync.profile"):
+            ingest_profile(data, store)
+    with report.span("sync.repos"):
+        ingest_repos(data, store)
+    if "languages" in sources:
+        with report.span("sync.languages"):
+            ingest_languages(data, store)
+    if "runs" in sources:
+        _each_repo(
+            store, "runs", data.repos[:RUN_REPOS],
+            lambda repo: ingest_workflow_runs(data, store, repo, _cursor(store, repo, "workflow_runs")),
+        )
+    history = [source for source in HISTORY if source in sources]
+    if history:
+        _each_repo(
+            store, "history", data.repos[:HISTORY_REPOS],
+            lambda repo: ingest_history(data, store, repo, started, history),
+        )
+    if "branches" in sources:
+        _each_repo(store, "branches", data.repos[:BRANCH_REPOS], lambda repo: ingest_branches(data, store, repo))
+    if "merge_commits" in sources:
+        _each_repo(store, "merge_commits", data.repos[:BRANCH_REPOS], lambda repo: ingest_merge_commits(data, store, repo))
+    store.commit()
+    data.entities.flush()
+
+
+def _push_commit(commit):
+    """A commit of a push payload, shaped like a commit listing record."""
+    author = commit.get("author") or {}
+    date = parse_github_timestamp(commit["timestamp"]).astimezone(timezone.utc)
+    return {
+        "sha": commit["id"],
+        "author": {"login": author.get("username")},
+        "commit": {"author": {"name": author.get("name"), "date": _timestamp(date)}, "message": commit.get("message")},
+    }
+
+
+def ingest_event(store, event, payload):
+    """Apply one webhook ``event`` to the store; False when it is not tracked.
+
+    Events of repositories outside the listing and pushes to other branches
+    than the default one are ignored. Pushed commits join the commit listing
+    without stats; the next sync fills those in like for any new commit.
+    """
+    repo = payload.get("repository") or {}
+    name = repo.get("name")
+    if event not in EVENTS or store.scalar("SELECT 1 FROM repos WHERE name = ?", name) is None:
+        return False
+    if event == "push":
+        if payload.get("ref") != f"refs/heads/{repo.get('default_branch')}":
+            return False
+        # Payloads list commits oldest first
+        _prepend_commits(store, name, [_push_commit(c) for c in reversed(payload.get("commits") or [])])
+    elif event == "pull_request":
+        pr = payload["pull_request"]
+        store.upsert("pulls", [_pull_row(name, pr)], key=("repo", "number"))
+        _rank_pulls(store, name)
+        _replace_labels(store, name, [pr])
+    elif event == "pull_request_review":
+        # Webhooks spell review states in lower case, the REST API in upper case
+        review = dict(payload["review"], state=(payload["review"].get("state") or "").upper())
+        store.upsert("reviews", [_review_row(name, payload["pull_request"]["number"], review)])
+    elif event == "issues":
+        issue = payload["issue"]
+        if payload.get("action") in ("deleted", "transferred"):
+            store.db.execute("DELETE FROM issues WHERE repo = ? AND number = ?", (name, issue["number"]))
+            store.db.execute("DELETE FROM labels WHERE repo = ? AND number = ?", (name, issue["number"]))
+        else:
+            store.upsert("issues", [_issue_row(name, issue)])
+            _replace_labels(store, name, [issue])
+    elif event == "workflow_run":
+        store.upsert("workflow_runs", [_run_row(name, payload["workflow_run"])])
+    return True
+
+
+def load_store(offline=OFFLINE, sources=SOURCES):
+    """Open the local store, refreshing ``sources`` from the API unless ``offline``."""
+    store = Store()
+    if not offline:
+        ingest(Dataset.from_env(), store, sources)
+    with report.span("aggregates"):
+        aggregates.fold(store)
+    return store
@@ -0,0 +1,117 @@
+"""Opt-in profiling of dashboard runs.
+
+``DASHBOARD_PROFILE`` is a comma-separated list of modes, written to
+``DASHBOARD_PROFILE_DIR`` (``profile/`` by default):
+
+* ``cpu``: a cProfile ``<section>.prof`` per section (``sync.history``,
+  ``commits.collect``, ``commits.render``, ...), for ``snakeviz`` or
+  ``python -m pstats``;
+* ``mem``: ``<section>.mem.txt`` with the section's peak traced memory and
+  the source lines that allocated the most while it ran;
+* ``spans``: ``trace.json``, Chrome trace events for every section across
+  the main process and the render workers (open in Perfetto or
+  ``chrome://tracing``).
+
+Sections are the ``report.span`` names, so profiling needs no changes to the
+generators. With the variable unset ``section`` only costs a set lookup.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+
+MODES = {"cpu", "mem", "spans"}
+PROFILE = {mode.strip() for mode in os.environ.get("DASHBOARD_PROFILE", "").lower().split(",") if mode.strip()}
+ARTIFACTS_DIR = Path(os.environ.get("DASHBOARD_PROFILE_DIR", "profile"))
+TOP_ALLOCATORS = 25
+
+if PROFILE - MODES:
+    raise RuntimeError(f"DASHBOARD_PROFILE: unknown mode(s) {', '.join(sorted(PROFILE - MODES))}; use {', '.join(sorted(MODES))}")
+
+# Chrome trace events recorded in this process, see ``drain``
+_events = []
+# cProfile and tracemalloc peaks cannot nest, so only the outermost section is profiled
+_depth = 0
+
+
+def _artifact(name):
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    return ARTIFACTS_DIR / name
+
+
+@contextmanager
+def section(name):
+    """Profile the block as ``name`` in every mode ``DASHBOARD_PROFILE`` enables."""
+    global _depth
+    if not PROFILE:
+        yield
+        return
+
+    outermost = _depth == 0
+    _depth += 1
+    profiler = cProfile.Profile() if "cpu" in PROFILE and outermost else None
+    memory = "mem" in PROFILE and outermost
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    started = time.perf_counter_ns()
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+        ended = time.perf_counter_ns()
+        _depth -= 1
+        if profiler:
+            profiler.dump_stats(_artifact(f"{name}.prof"))
+        if memory:
+            _write_memory(name, before)
+        if "spans" in PROFILE:
+            _events.append({
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": started // 1000,
+                "dur": (ended - started) // 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+            })
+
+
+def _write_memory(name, before):
+    _, peak = tracemalloc.get_traced_memory()
+    growth = _own(tracemalloc.take_snapshot()).compare_to(_own(before), "lineno")
+    lines = [f"peak {peak / 2**20:.1f} MiB", f"top {TOP_ALLOCATORS} allocating lines (net change while {name} ran):"]
+    lines.extend(str(stat) for stat in growth[:TOP_ALLOCATORS])
+    _artifact(f"{name}.mem.txt").write_text("\n".join(lines) + "\n")
+
+
+def _own(snapshot):
+    """Leave out the profilers' own allocations."""
+    return snapshot.filter_traces([tracemalloc.Filter(False, cProfile.__file__), tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def drain():
+    """Hand over (and forget) this process's trace events, e.g. from a pool worker."""
+    events = _events[:]
+    _events.clear()
+    return events
+
+
+def write_trace(events=()):
+    """Write this process's trace events plus ``events`` from workers as ``trace.json``."""
+    if "spans" not in PROFILE:
+        return
+    trace = drain() + list(events)
+    trace.sort(key=lambda event: event["ts"])
+    _artifact("trace.json").write_text(json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}) + "\n")
@@ -0,0 +1,85 @@
+"""Timing and request accounting for one dashboard run.
+
+``span(name)`` times a block and attributes the GitHub traffic made inside
+it (see ``github_api.traffic``) to ``name``; sections are named
+``sync.<phase>``, ``<generator>.collect`` and ``<generator>.render``.
+Charts are timed by ``chart_style.Manifest`` as ``<generator>.<chart>``.
+``write`` saves everything to ``REPORT_PATH`` and ``summary`` formats it as
+a table for the job log. Spans are also the sections ``DASHBOARD_PROFILE``
+profiles (see ``profiling``).
+"""
+
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import github_api
+import profiling
+from utils.time import utc_now
+
+
+REPORT_PATH = Path("metrics/_run_report.json")
+COUNTERS = ("requests", "cache_hits", "not_modified", "bytes", "http_seconds", "parse_seconds")
+
+# section name -> totals, in the order sections first ran
+_sections = {}
+
+
+def _section(name):
+    return _sections.setdefault(name, {"seconds": 0.0, **{key: 0 for key in COUNTERS}})
+
+
+@contextmanager
+def span(name):
+    """Add the block's wall time and GitHub traffic to section ``name``."""
+    before = github_api.traffic()
+    started = time.perf_counter()
+    try:
+        with profiling.section(name):
+            yield
+    finally:
+        after = github_api.traffic()
+        section = _section(name)
+        section["seconds"] += time.perf_counter() - started
+        for key in COUNTERS:
+            section[key] += after[key] - before[key]
+
+
+def add(name, seconds):
+    """Record ``seconds`` measured elsewhere (e.g. in a render worker) for ``name``."""
+    _section(name)["seconds"] += seconds
+
+
+def sections():
+    return [{"name": name, **{key: round(value, 4) for key, value in totals.items()}} for name, totals in _sections.items()]
+
+
+def write(charts=(), path=REPORT_PATH):
+    """Save every section and the per-chart timings as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "generated_at": utc_now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "http": github_api.traffic(),
+        "sections": sections(),
+        "charts": list(charts),
+    }
+    path.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def summary(charts=(), slowest=10):
+    """Table of every section plus the ``slowest`` rendered charts."""
+    lines = [
+        f"{'section':<28} {'seconds':>8} {'requests':>9} {'cached':>7} {'304':>5} {'KB':>8} {'http s':>7} {'parse s':>8}",
+    ]
+    for row in sections():
+        lines.append(
+            f"{row['name']:<28} {row['seconds']:>8.2f} {row['requests']:>9} {row['cache_hits']:>7} "
+            f"{row['not_modified']:>5} {row['bytes'] / 1024:>8.0f} {row['http_seconds']:>7.2f} {row['parse_seconds']:>8.2f}"
+        )
+    drawn = sorted((chart for chart in charts if not chart["skipped"]), key=lambda chart: chart["seconds"], reverse=True)
+    skipped = sum(chart["skipped"] for chart in charts)
+    lines.append(f"\n{len(drawn)} charts drawn, {skipped} unchanged; slowest:")
+    lines.extend(f"  {chart['chart']:<40} {chart['seconds']:>6.2f}s" for chart in drawn[:slowest])
+    return "\n".join(lines)
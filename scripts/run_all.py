@@ -0,0 +1,135 @@
+"""
+Generate the whole GitHub dashboard in a single run.
+
+The API data is ingested once into the local SQLite store and every
+generator computes its charts from it; ``DASHBOARD_OFFLINE=1`` re-renders
+without any requests. Collection yields plain data, so the render stage
+fans the generators out to a process pool, ``DASHBOARD_RENDER_WORKERS``
+processes wide (one per CPU by default).
+
+Every sync phase, collection and render is timed and its GitHub traffic
+counted; the result is written to ``metrics/_run_report.json`` and printed
+as a summary table at the end. ``DASHBOARD_PROFILE`` additionally profiles
+the same sections (see ``profiling``).
+
+Every chart is registered as ``<generator>.<chart>`` (e.g.
+``prs.pr_review_latency``) together with the ingest sources it reads, from
+each generator's ``CHARTS``. ``--only`` takes a comma-separated list of ids
+or shell-style patterns and syncs, collects and draws just those charts:
+
+    python scripts/run_all.py --list
+    python scripts/run_all.py --only prs.pr_review_latency,repos.*
+"""
+
+import argparse
+import importlib
+import os
+import time
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor
+
+import generate_commits
+import generate_prs
+import generate_repos
+import generate_languages
+import generate_social
+import generate_ci_cd
+import generate_fun
+import generate_analytics
+import chart_style
+import profiling
+import report
+from ingest import SOURCES, load_store, needed_sources
+
+GENERATORS = [
+    generate_commits,
+    generate_prs,
+    generate_repos,
+    generate_languages,
+    generate_social,
+    generate_ci_cd,
+    generate_fun,
+    generate_analytics,
+]
+RENDER_WORKERS = int(os.environ.get("DASHBOARD_RENDER_WORKERS", os.cpu_count() or 1))
+# "<generator>.<chart>" -> (generator module, ingest sources it reads)
+CHARTS = {
+    f"{generator.__name__.removeprefix('generate_')}.{chart}": (generator, sources)
+    for generator in GENERATORS
+    for chart, sources in generator.CHARTS.items()
+}
+
+
+def select(patterns):
+    """Chart ids matching any of ``patterns``; a pattern matching nothing is an error."""
+    selected = []
+    for pattern in patterns:
+        matches = [chart for chart in CHARTS if fnmatchcase(chart, pattern)]
+        if not matches:
+            raise ValueError(f"no chart matches {pattern!r}; see --list")
+        selected.extend(chart for chart in matches if chart not in selected)
+    return selected
+
+
+def render(name, results, selected=None):
+    """Render one generator's charts; runs inside a pool worker."""
+    generator = importlib.import_module(name)
+    chart_style.select(selected)
+    chart_style.RENDERED.clear()
+    started = time.perf_counter()
+    with profiling.section(f"{_short(name)}.render"):
+        generator.render(results)
+    seconds = time.perf_counter() - started
+    return generator.OUTPUT_DIR, seconds, list(chart_style.RENDERED), profiling.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the GitHub dashboard, or only some of its charts.")
+    parser.add_argument("--only", help="comma-separated chart ids or patterns, e.g. prs.pr_review_latency,repos.*")
+    parser.add_argument("--list", action="store_true", help="print every chart id with the sources it reads")
+    args = parser.parse_args()
+
+    if args.list:
+        for chart, (_, sources) in CHARTS.items():
+            print(f"{chart:<36} {', '.join(sources)}")
+        return
+    if args.only:
+        try:
+            selected = select(args.only.split(","))
+        except ValueError as exc:
+            parser.error(str(exc))
+        generators = [generator for generator in GENERATORS if any(CHARTS[chart][0] is generator for chart in selected)]
+        sources = needed_sources(CHARTS[chart][1] for chart in selected)
+    else:
+        selected, generators, sources = None, GENERATORS, SOURCES
+
+    with load_store(sources=sources) as store:
+        specs = []
+        for generator in generators:
+            with report.span(f"{_short(generator.__name__)}.collect"):
+                specs.append((generator.__name__, generator.collect(store), selected))
+
+    if RENDER_WORKERS > 1 and len(specs) > 1:
+        with ProcessPoolExecutor(max_workers=RENDER_WORKERS) as pool:
+            outputs = list(pool.map(render, *zip(*specs)))
+    else:
+        outputs = [render(*spec) for spec in specs]
+
+    charts, events = [], []
+    for (name, *_), (output_dir, seconds, rendered, spans) in zip(specs, outputs):
+        report.add(f"{_short(name)}.render", seconds)
+        charts.extend(rendered)
+        events.extend(spans)
+        print(f"✅ {output_dir} generated")
+    report.write(charts)
+    profiling.write_trace(events)
+    print(report.summary(charts))
+    print("✅ Dashboard generated successfully!")
+
+
+def _short(name):
+    return name.removeprefix("generate_")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Polarity of commit messages, scored once per commit.
+
+``score`` rates every commit in the store that has no polarity yet and keeps
+the result in ``commit_polarity`` keyed by SHA, so a message is never scored
+twice and TextBlob is only loaded when new commits arrived. Distinct
+messages are scored in batches of ``BATCH_SIZE``; a backlog of more than
+``PARALLEL_THRESHOLD`` messages (e.g. a first full sync) is spread over
+``DASHBOARD_SENTIMENT_WORKERS`` processes, one per CPU by default.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+
+BATCH_SIZE = 500
+PARALLEL_THRESHOLD = 5000
+SENTIMENT_WORKERS = int(os.environ.get("DASHBOARD_SENTIMENT_WORKERS", os.cpu_count() or 1))
+
+
+def polarities(messages):
+    """TextBlob polarity of each of ``messages``, in order."""
+    # The analyzer behind TextBlob(...).sentiment, built once per batch
+    from textblob.en.sentiments import PatternAnalyzer
+
+    analyzer = PatternAnalyzer()
+    return [analyzer.analyze(message).polarity for message in messages]
+
+
+def score(store):
+    """Score every commit without a stored polarity; returns how many were scored."""
+    pending = store.query(
+        "SELECT DISTINCT c.sha, c.message FROM commits c WHERE c.position IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM commit_polarity p WHERE p.sha = c.sha)"
+    )
+    if not pending:
+        return 0
+
+    messages = list(dict.fromkeys(row["message"] or "" for row in pending))
+    batches = [messages[i:i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)]
+    if len(messages) > PARALLEL_THRESHOLD and SENTIMENT_WORKERS > 1:
+        with ProcessPoolExecutor(max_workers=SENTIMENT_WORKERS) as pool:
+            scored = list(pool.map(polarities, batches))
+    else:
+        scored = [polarities(batch) for batch in batches]
+    polarity = dict(zip(messages, chain.from_iterable(scored)))
+
+    store.db.executemany(
+        "INSERT OR REPLACE INTO commit_polarity (sha, polarity) VALUES (?, ?)",
+        [(row["sha"], polarity[row["message"] or ""]) for row in pending],
+    )
+    store.commit()
+    return len(pending)
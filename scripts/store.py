@@ -0,0 +1,287 @@
+"""Local SQLite store of normalized GitHub data.
+
+``ingest.py`` writes API results into these tables and the generators
+compute every chart from them, so charts can be re-rendered or new metrics
+added without a single API call.
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+
+STORE_PATH = Path(os.environ.get("DASHBOARD_STORE", ".cache/dashboard.sqlite"))
+# Subquery for the first N repositories of the listing, e.g.
+# f"WHERE repo IN ({TOP_REPOS})" with N as the parameter.
+TOP_REPOS = "SELECT name FROM repos WHERE position < ?"
+# Bump whenever SCHEMA changes; older stores are dropped and rebuilt.
+SCHEMA_VERSION = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS orgs (
+    login TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS starred (
+    full_name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS repos (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    fork INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL DEFAULT 0,
+    stargazers_count INTEGER NOT NULL DEFAULT 0,
+    forks_count INTEGER NOT NULL DEFAULT 0,
+    watchers_count INTEGER NOT NULL DEFAULT 0,
+    open_issues_count INTEGER NOT NULL DEFAULT 0,
+    allow_auto_merge INTEGER NOT NULL DEFAULT 0,
+    languages_url TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    pushed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS repo_languages (
+    repo TEXT NOT NULL,
+    language TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (repo, language)
+);
+CREATE TABLE IF NOT EXISTS repo_topics (
+    repo TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    PRIMARY KEY (repo, topic)
+);
+CREATE TABLE IF NOT EXISTS branches (
+    repo TEXT NOT NULL,
+    name TEXT NOT NULL,
+    head_sha TEXT,
+    commit_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, name)
+);
+CREATE TABLE IF NOT EXISTS contributors (
+    repo TEXT NOT NULL,
+    login TEXT NOT NULL,
+    contributions INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, login)
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    position INTEGER,
+    author TEXT,
+    authored_at TEXT,
+    message TEXT,
+    additions INTEGER,
+    deletions INTEGER,
+    PRIMARY KEY (repo, sha)
+);
+CREATE INDEX IF NOT EXISTS commits_by_date ON commits (repo, authored_at);
+-- Covers events.frame: listed commits' dates by repository, without table lookups
+CREATE INDEX IF NOT EXISTS commits_listed ON commits (repo, authored_at, position);
+CREATE INDEX IF NOT EXISTS commits_by_author ON commits (author);
+CREATE TABLE IF NOT EXISTS commit_polarity (
+    sha TEXT PRIMARY KEY,
+    polarity REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commit_files (
+    repo TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    PRIMARY KEY (repo, sha, filename)
+);
+CREATE TABLE IF NOT EXISTS pulls (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    position INTEGER,
+    state TEXT,
+    author TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    closed_at TEXT,
+    merged_at TEXT,
+    merge_commit_sha TEXT,
+    comments INTEGER NOT NULL DEFAULT 0,
+    review_comments INTEGER NOT NULL DEFAULT 0,
+    mergeable_state TEXT,
+    url TEXT,
+    -- updated_at when the reviews were last fetched
+    reviewed_at TEXT,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS pulls_by_date ON pulls (repo, created_at);
+CREATE INDEX IF NOT EXISTS pulls_by_author ON pulls (author);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    pull_number INTEGER NOT NULL,
+    reviewer TEXT,
+    state TEXT,
+    submitted_at TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_by_pull ON reviews (repo, pull_number);
+CREATE INDEX IF NOT EXISTS reviews_by_reviewer ON reviews (reviewer);
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    state TEXT,
+    author TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    closed_at TEXT,
+    body TEXT,
+    is_pull_request INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, number)
+);
+CREATE INDEX IF NOT EXISTS issues_by_date ON issues (repo, created_at);
+CREATE INDEX IF NOT EXISTS issues_by_author ON issues (author);
+CREATE TABLE IF NOT EXISTS labels (
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (repo, number, name)
+);
+CREATE INDEX IF NOT EXISTS labels_by_name ON labels (name);
+CREATE TABLE IF NOT EXISTS workflow_runs (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    event TEXT,
+    status TEXT,
+    conclusion TEXT,
+    created_at TEXT,
+    run_started_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS workflow_runs_by_date ON workflow_runs (repo, created_at);
+CREATE TABLE IF NOT EXISTS aggregate_counts (
+    metric TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, repo, key)
+);
+CREATE TABLE IF NOT EXISTS aggregate_events (
+    metric TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (metric, repo, event_id)
+);
+CREATE TABLE IF NOT EXISTS webhook_deliveries (
+    id TEXT PRIMARY KEY,
+    event TEXT NOT NULL,
+    received_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    repo TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    cursor TEXT NOT NULL,
+    PRIMARY KEY (repo, resource)
+);
+"""
+
+
+class Store:
+    """Thin wrapper over the dashboard's SQLite database."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        if self.scalar("PRAGMA user_version") != SCHEMA_VERSION:
+            self._drop_all()
+        self.db.executescript(SCHEMA)
+        self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _drop_all(self):
+        for name in self.column("SELECT name FROM sqlite_master WHERE type = 'table'"):
+            self.db.execute(f"DROP TABLE {name}")
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- reading --------------------------------------------------------
+
+    def query(self, sql, *params):
+        return self.db.execute(sql, params).fetchall()
+
+    def column(self, sql, *params):
+        return [row[0] for row in self.db.execute(sql, params)]
+
+    def scalar(self, sql, *params):
+        row = self.db.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def frame(self, sql, *params):
+        """Run ``sql`` into a pandas DataFrame."""
+        import pandas as pd
+
+        return pd.read_sql_query(sql, self.db, params=params)
+
+    def top_repos(self, limit=None):
+        """Repository names in listing order, optionally only the first ``limit``."""
+        return self.column("SELECT name FROM repos ORDER BY position LIMIT ?", -1 if limit is None else limit)
+
+    def profile(self, key, default=0):
+        value = self.scalar("SELECT value FROM profile WHERE key = ?", key)
+        return default if value is None else value
+
+    def cursor(self, repo, resource):
+        """High-water mark of the last sync of ``resource`` for ``repo``, or None."""
+        return self.scalar("SELECT cursor FROM sync_state WHERE repo = ? AND resource = ?", repo, resource)
+
+    # -- writing --------------------------------------------------------
+
+    def upsert(self, table, rows, key=None):
+        """Insert ``rows`` (dicts with identical keys), replacing on key conflicts.
+
+        With ``key`` (the primary key columns) a conflicting row is updated
+        instead, so columns missing from ``rows`` keep their values.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        columns = list(rows[0])
+        values = ", ".join("?" for _ in columns)
+        if key:
+            updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column not in key)
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values}) ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}"
+        else:
+            sql = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({values})"
+        self.db.executemany(sql, [tuple(row[c] for c in columns) for row in rows])
+
+    def replace(self, table, rows, **where):
+        """Replace every row matching ``where`` (or the whole table) with ``rows``."""
+        clause = " AND ".join(f"{column} = ?" for column in where)
+        self.db.execute(f"DELETE FROM {table}" + (f" WHERE {clause}" if clause else ""), tuple(where.values()))
+        self.upsert(table, rows)
+
+    def set_cursor(self, repo, resource, cursor):
+        self.db.execute(
+            "INSERT OR REPLACE INTO sync_state (repo, resource, cursor) VALUES (?, ?, ?)", (repo, resource, cursor)
+        )
+
+    @contextmanager
+    def savepoint(self, name="sync"):
+        """Roll back every write made in the block if it raises."""
+        self.db.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except BaseException:
+            self.db.execute(f"ROLLBACK TO {name}")
+            self.db.execute(f"RELEASE {name}")
+            raise
+        self.db.execute(f"RELEASE {name}")
+
+    def commit(self):
+        self.db.commit()
@@ -10,3 +10,11 @@ def parse_github_timestamp(ts: str):
     Example: 2025-01-06T13:42:11Z
     """
     return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+def epoch_seconds(column: str):
+    """
+    SQLite expression turning a GitHub timestamp column into Unix seconds,
+    so whole columns are parsed inside the store rather than row by row.
+    Example: f"SELECT {epoch_seconds('created_at')} FROM pulls"
+    """
+    return f"CAST(strftime('%s', {column}) AS INTEGER)"
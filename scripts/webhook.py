@@ -0,0 +1,144 @@
+"""
+Receive GitHub webhooks and write their events into the local store.
+
+An event-driven alternative to polling: point a webhook of the account's
+repositories (or organizations) at this receiver, content type
+``application/json``, with the ``push``, ``pull_request``,
+``pull_request_review``, ``issues`` and ``workflow_run`` events. Every
+delivery is applied to the SQLite store as it arrives (see
+``ingest.ingest_event``), so ``DASHBOARD_OFFLINE=1 python scripts/run_all.py``
+renders up-to-date charts without spending any REST budget. A periodic
+regular sync still fills in what webhooks do not carry, such as commit
+stats.
+
+    DASHBOARD_WEBHOOK_SECRET=... python scripts/webhook.py --port 8900 --record deliveries.jsonl
+    python scripts/webhook.py --replay deliveries.jsonl
+
+Deliveries whose ``X-Hub-Signature-256`` does not match
+``DASHBOARD_WEBHOOK_SECRET`` are rejected. Each delivery id is recorded in
+``webhook_deliveries``, so GitHub's redeliveries are applied once.
+``--record`` appends every accepted delivery to a JSON-lines file as
+``{"event", "delivery", "payload"}``; ``--replay`` applies such files
+(or hand-written payloads in the same shape) without a server.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from ingest import ingest_event
+from store import Store
+from utils.time import utc_now
+
+
+WEBHOOK_SECRET = os.environ.get("DASHBOARD_WEBHOOK_SECRET")
+# GitHub caps webhook payloads at 25 MB
+MAX_BODY = 25 * 1024 * 1024
+
+
+def verify(secret, body, signature):
+    """Whether ``signature`` (an ``X-Hub-Signature-256`` header) signs ``body`` with ``secret``."""
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+def deliver(store, event, delivery, payload):
+    """Apply one delivery; returns "applied", "ignored" or "duplicate"."""
+    if delivery and store.scalar("SELECT 1 FROM webhook_deliveries WHERE id = ?", delivery):
+        return "duplicate"
+    with store.savepoint():
+        applied = ingest_event(store, event, payload)
+        if delivery:
+            store.upsert(
+                "webhook_deliveries",
+                [{"id": delivery, "event": event, "received_at": utc_now().strftime("%Y-%m-%dT%H:%M:%SZ")}],
+            )
+    store.commit()
+    return "applied" if applied else "ignored"
+
+
+def replay(store, paths):
+    """Apply the recorded deliveries in ``paths``, in order; returns a count per outcome."""
+    outcomes = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                outcome = deliver(store, record["event"], record.get("delivery"), record["payload"])
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
+
+
+def make_server(store, secret, host="127.0.0.1", port=8900, record=None):
+    """HTTP server applying verified deliveries to ``store``, one at a time."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                return self._reply(413, "payload too large")
+            body = self.rfile.read(length)
+            if not verify(secret, body, self.headers.get("X-Hub-Signature-256")):
+                return self._reply(401, "signature mismatch")
+            event = self.headers.get("X-GitHub-Event", "")
+            if event == "ping":
+                return self._reply(200, "pong")
+            delivery = self.headers.get("X-GitHub-Delivery")
+            try:
+                payload = json.loads(body)
+                outcome = deliver(store, event, delivery, payload)
+            except (ValueError, KeyError, TypeError) as exc:
+                print(f"⚠️ {event} delivery {delivery} rejected: {exc!r}")
+                return self._reply(400, "unexpected payload")
+            if record and outcome != "duplicate":
+                with open(record, "a", encoding="utf-8") as file:
+                    file.write(json.dumps({"event": event, "delivery": delivery, "payload": payload}) + "\n")
+            print(f"{event} delivery {delivery}: {outcome}")
+            self._reply(202, outcome)
+
+        def _reply(self, status, message):
+            data = message.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    # Single-threaded: deliveries are small and SQLite takes one writer anyway
+    return HTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--record", help="append accepted deliveries to this JSON-lines file")
+    parser.add_argument("--replay", nargs="+", metavar="FILE", help="apply recorded deliveries instead of serving")
+    args = parser.parse_args()
+
+    with Store() as store:
+        if args.replay:
+            outcomes = replay(store, args.replay)
+            print(f"✅ Replayed {sum(outcomes.values())} deliveries: "
+                  + ", ".join(f"{count} {outcome}" for outcome, count in sorted(outcomes.items())))
+            return
+        if not WEBHOOK_SECRET:
+            raise RuntimeError("DASHBOARD_WEBHOOK_SECRET environment variable not set")
+        server = make_server(store, WEBHOOK_SECRET, args.host, args.port, args.record)
+        print(f"Receiving webhooks on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()